@@ -1,3 +1,4 @@
+import os
 import rasterio
 from pycraf import pathprof
 import numpy as np
@@ -5,8 +6,12 @@ import matplotlib.pyplot as plt
 from astropy import units as u
 from pyproj import Geod
 
-# Configuración para descargar automáticamente los archivos de altura de terreno faltantes
-pathprof.SrtmConf.set(download='missing')
+# Configuración de los archivos de altura de terreno: con SRTM_LOCAL se usan solo las teselas .hgt
+# de ese directorio (equipos sin red); si no, se descargan automáticamente los faltantes
+if os.environ.get('SRTM_LOCAL'):
+    pathprof.SrtmConf.set(srtm_dir=os.environ['SRTM_LOCAL'], download='never')
+else:
+    pathprof.SrtmConf.set(download='missing')
 
 # 1. Cargar el archivo GeoTIFF de zonas de clutter reclasificado
 archivo_clutter = 'ESA_WorldCoverLosAngeles_reclassified_to_Corine.tif'  # Reemplaza con la ruta de tu archivo
@@ -25,9 +30,11 @@ lon_r, lat_r = -121.55 * u.deg,  38.5* u.deg  # Receptor
 
 # 4. Obtener las zonas de clutter para el transmisor y receptor
 def obtener_zona_clutter(lon, lat, clutter_zones, transform):
-    # Convertir coordenadas geográficas a píxeles
-    x, y = ~transform * (lon, lat)  # ~transform es la inversa de la transformación
-    x, y = int(x), int(y)
+    # Convertir coordenadas geográficas a píxeles (acepta escalares o arreglos de puntos)
+    inversa = ~transform  # ~transform es la inversa de la transformación
+    lon, lat = np.asarray(lon, dtype=float), np.asarray(lat, dtype=float)
+    x = np.floor(inversa.a * lon + inversa.b * lat + inversa.c).astype(int)
+    y = np.floor(inversa.d * lon + inversa.e * lat + inversa.f).astype(int)
     return clutter_zones[y, x]  # Obtener la zona de clutter en las coordenadas
 
 zone_t = obtener_zona_clutter(lon_t.value, lat_t.value, p452_clutter_zones, transform)
@@ -1,68 +1,109 @@
-import math
+import numpy as np
+
+# Categorías de clutter (obstrucciones) basadas en ITU-R P.452-16 Tabla 4
+CATEGORIAS_CLUTTER = [
+    "Campos de cultivo alto",
+    "Zonas de parque",
+    "Centro de pueblo",
+    "Árboles caducifolios (regular)",
+    "Bosque de coníferas (irregular)",
+    "Bosque tropical",
+    "Zona suburbana",
+    "Suburbano denso",
+    "Urbano",
+    "Urbano denso",
+    "Urbano con rascacielos",
+    "Zona industrial",
+]
+# Altura nominal (m) y distancia nominal (km) del clutter de cada categoría
+H_A = np.array([4, 4, 5, 15, 20, 20, 9, 12, 20, 25, 35, 20], dtype=float)
+D_K = np.array([0.1, 0.1, 0.07, 0.05, 0.05, 0.03, 0.025, 0.02, 0.02, 0.02, 0.02, 0.05])
+
+# Categoría de cada zona P.452 de pycraf (CLUTTER), indexada por zona + 1; -1 es UNKNOWN (sin clutter)
+ZONA_P452_A_CATEGORIA = np.array([-1, 0, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11])
+
+def factor_frecuencia(frecuencia):
+    """Factor de frecuencia F_fc (frecuencia en GHz, escalar o arreglo)."""
+    return 0.25 + 0.375 * (1 + np.tanh(7.5 * (np.asarray(frecuencia, dtype=float) - 0.5)))
+
+def limites_perdida(frecuencia):
+    """Pérdida mínima y máxima (dB) admitidas según ITU-R P.452-16."""
+    frecuencia = np.asarray(frecuencia, dtype=float)
+    min_perdida = np.where(frecuencia >= 0.1, 5.0, 0.0)
+    max_perdida = np.where(frecuencia >= 0.9, 20.0, min_perdida + (frecuencia - 0.1) * (20 - 5) / 0.8)
+    return min_perdida, max_perdida
+
+def perdida_clutter(categorias, frecuencias, alturas=None):
+    """Pérdida por clutter A_h (dB) sin ajustar y ajustada, para arreglos que se combinan por broadcasting.
+
+    `categorias` son índices de CATEGORIAS_CLUTTER, `frecuencias` en GHz y
+    `alturas` de antena en m (None usa la altura nominal de cada categoría).
+    """
+    categorias = np.asarray(categorias)
+    h_a, d_k = H_A[categorias], D_K[categorias]
+    h = h_a if alturas is None else np.asarray(alturas, dtype=float)
+
+    # Paso 1: Calcular factor de frecuencia (F_fc)
+    F_fc = factor_frecuencia(frecuencias)
+
+    # Paso 2: Calcular pérdida por clutter (A_h)
+    tanh_arg = 6 * (h / h_a - 0.625)
+    A_h = 10.25 * F_fc * np.exp(-d_k) * (1 - np.tanh(tanh_arg)) - 0.33
+
+    # Ajustar pérdida entre 5 dB y 20 dB (según ITU-R P.452-16)
+    min_perdida, max_perdida = limites_perdida(frecuencias)
+    # Por debajo de 0.1 GHz el máximo queda bajo el mínimo: gana el mínimo, como max(min, min(A_h, max))
+    return A_h, np.maximum(min_perdida, np.minimum(A_h, max_perdida))
+
+def mapa_perdida_clutter(zonas_p452, frecuencia, altura=None, dtype=np.float32):
+    """Pérdida ajustada (dB) de cada píxel de un raster de zonas P.452 en una sola pasada.
+
+    La pérdida se calcula una vez por zona y se asigna con una tabla de
+    consulta; las zonas UNKNOWN (o fuera de la tabla) quedan en 0 dB.
+    `frecuencia` y `altura` son escalares.
+    """
+    # tabla[zona + 1]; el primer lugar es UNKNOWN y el último, las zonas fuera de la tabla
+    tabla = np.zeros(len(ZONA_P452_A_CATEGORIA) + 1, dtype=dtype)
+    tabla[1:len(ZONA_P452_A_CATEGORIA)] = perdida_clutter(ZONA_P452_A_CATEGORIA[1:], frecuencia, altura)[1]
+
+    indices = np.asarray(zonas_p452).astype(np.intp) + 1
+    indices[(indices < 0) | (indices >= len(ZONA_P452_A_CATEGORIA))] = len(tabla) - 1
+    return tabla[indices]
 
 def calcular_perdida_clutter():
-    # Categorías de clutter (obstrucciones) basadas en ITU-R P.452-16 Tabla 4
-    categorias_clutter = [
-        {"nombre": "Campos de cultivo alto", "h_a": 4, "d_k": 0.1},
-        {"nombre": "Zonas de parque", "h_a": 4, "d_k": 0.1},
-        {"nombre": "Centro de pueblo", "h_a": 5, "d_k": 0.07},
-        {"nombre": "Árboles caducifolios (regular)", "h_a": 15, "d_k": 0.05},
-        {"nombre": "Bosque de coníferas (irregular)", "h_a": 20, "d_k": 0.05},
-        {"nombre": "Bosque tropical", "h_a": 20, "d_k": 0.03},
-        {"nombre": "Zona suburbana", "h_a": 9, "d_k": 0.025},
-        {"nombre": "Suburbano denso", "h_a": 12, "d_k": 0.02},
-        {"nombre": "Urbano", "h_a": 20, "d_k": 0.02},
-        {"nombre": "Urbano denso", "h_a": 25, "d_k": 0.02},
-        {"nombre": "Urbano con rascacielos", "h_a": 35, "d_k": 0.02},
-        {"nombre": "Zona industrial", "h_a": 20, "d_k": 0.05}
-    ]
-    
     # Mostrar opciones de clutter
     print("\nOpciones de categorías de clutter (obstrucciones):")
-    for i, categoria in enumerate(categorias_clutter, start=1):
-        print(f"{i}. {categoria['nombre']}")
-    
+    for i, nombre in enumerate(CATEGORIAS_CLUTTER, start=1):
+        print(f"{i}. {nombre}")
+
     # Solicitar entrada del usuario
     try:
         seleccion = int(input("\nSeleccione el tipo de clutter (número): "))
-        if seleccion < 1 or seleccion > len(categorias_clutter):
+        if seleccion < 1 or seleccion > len(CATEGORIAS_CLUTTER):
             raise ValueError
     except ValueError:
         print("¡Entrada inválida! Por favor ingrese un número de la lista.")
         return
-    
+
     frecuencia = float(input("Ingrese la frecuencia (GHz, ej. 2.0 para 2 GHz): "))
     if frecuencia < 0.1 or frecuencia > 100:
         print("La frecuencia debe estar entre 0.1 GHz y 100 GHz.")
         return
-    
-    h_a = categorias_clutter[seleccion-1]["h_a"]
-    d_k = categorias_clutter[seleccion-1]["d_k"]
-    
+
+    h_a = H_A[seleccion-1]
+    d_k = D_K[seleccion-1]
+
     # Altura de la antena (opcional)
-    h = input(f"Ingrese la altura de la antena (m) [por defecto={h_a}]: ")
+    h = input(f"Ingrese la altura de la antena (m) [por defecto={h_a:g}]: ")
     h = float(h) if h.strip() else h_a
-    
-    # Paso 1: Calcular factor de frecuencia (F_fc)
-    F_fc = 0.25 + 0.375 * (1 + math.tanh(7.5 * (frecuencia - 0.5)))
-    
-    # Paso 2: Calcular pérdida por clutter (A_h)
-    tanh_arg = 6 * (h / h_a - 0.625)
-    A_h = 10.25 * F_fc * math.exp(-d_k) * (1 - math.tanh(tanh_arg)) - 0.33
-    
-    # Ajustar pérdida entre 5 dB y 20 dB (según ITU-R P.452-16)
-    min_perdida = 5.0 if frecuencia >= 0.1 else 0.0
-    if frecuencia >= 0.9:
-        max_perdida = 20.0
-    else:
-        max_perdida = min_perdida + (frecuencia - 0.1) * (20 - 5) / 0.8
-    A_h_ajustada = max(min_perdida, min(A_h, max_perdida))
-    
+
+    A_h, A_h_ajustada = perdida_clutter(seleccion-1, frecuencia, h)
+
     # Mostrar resultados
     print("\n--- Resultados ---")
-    print(f"Categoría de clutter: {categorias_clutter[seleccion-1]['nombre']}")
-    print(f"Altura nominal del clutter (h_a): {h_a} m")
-    print(f"Distancia nominal del clutter (d_k): {d_k} km")
+    print(f"Categoría de clutter: {CATEGORIAS_CLUTTER[seleccion-1]}")
+    print(f"Altura nominal del clutter (h_a): {h_a:g} m")
+    print(f"Distancia nominal del clutter (d_k): {d_k:g} km")
     print(f"Frecuencia: {frecuencia} GHz")
     print(f"Altura de la antena: {h} m")
     print(f"Pérdida por clutter (sin ajustar): {A_h:.2f} dB")
@@ -0,0 +1,174 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import numpy as np
+import rasterio
+from rasterio.transform import Affine
+from rasterio.windows import Window
+from PerdidasPorClutterITU import D_K, H_A, mapa_perdida_clutter
+
+# Nombre del manifiesto dentro del directorio de rasters precalculados
+MANIFIESTO = "manifiesto.json"
+# Filas de la franja leída en cada paso del precálculo
+FILAS_POR_FRANJA = 2048
+
+def nombre_raster(frecuencia, altura):
+    """Archivo .npy de la pérdida para una frecuencia (GHz) y altura de antena (m, None = nominal)."""
+    altura = "nominal" if altura is None else f"{float(altura):g}m"
+    return f"perdida_{float(frecuencia):g}GHz_{altura}.npy"
+
+def huella_entradas(ruta_zonas, es_corine, frecuencias, alturas):
+    """Identifica las entradas del precálculo: archivo de zonas (ruta, tamaño y fecha), parámetros y tabla de clutter."""
+    estado = os.stat(ruta_zonas)
+    texto = repr((
+        os.path.abspath(ruta_zonas), estado.st_size, estado.st_mtime_ns, bool(es_corine),
+        sorted(float(f) for f in frecuencias), sorted(-1.0 if h is None else float(h) for h in alturas),
+        H_A.tobytes(), D_K.tobytes(),
+    ))
+    return hashlib.sha1(texto.encode()).hexdigest()
+
+def precalcular(ruta_zonas, directorio, frecuencias, alturas=(None,), es_corine=True):
+    """Escribe un raster de pérdida por clutter (float16, dB) por cada frecuencia y altura.
+
+    `ruta_zonas` es un GeoTIFF Corine (`es_corine`) o de zonas P.452. Los
+    rasters se guardan como .npy en `directorio` junto a un manifiesto con
+    la georreferencia y la huella de las entradas; si la huella coincide con
+    la del manifiesto existente no se recalcula nada. Al escribir un
+    manifiesto nuevo se borran los rasters de combinaciones anteriores que
+    ya no figuran en él. El archivo se recorre por franjas, así la memoria
+    no depende de su tamaño. Devuelve el manifiesto.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    huella = huella_entradas(ruta_zonas, es_corine, frecuencias, alturas)
+    ruta_manifiesto = os.path.join(directorio, MANIFIESTO)
+    try:
+        with open(ruta_manifiesto) as f:
+            manifiesto = json.load(f)
+        if manifiesto["huella"] == huella and all(
+            os.path.exists(os.path.join(directorio, r["archivo"])) for r in manifiesto["rasters"]
+        ):
+            return manifiesto
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+
+    combinaciones = [(float(f), None if h is None else float(h)) for f in frecuencias for h in alturas]
+    with rasterio.open(ruta_zonas) as src:
+        salidas = {
+            combinacion: np.lib.format.open_memmap(
+                os.path.join(directorio, nombre_raster(*combinacion)) + ".tmp", mode="w+",
+                dtype=np.float16, shape=(src.height, src.width),
+            )
+            for combinacion in combinaciones
+        }
+        for fila in range(0, src.height, FILAS_POR_FRANJA):
+            alto = min(FILAS_POR_FRANJA, src.height - fila)
+            zonas = src.read(1, window=Window(0, fila, src.width, alto))
+            if es_corine:
+                from pycraf import pathprof
+                zonas = pathprof.landcover_to_p452_clutter_zones(zonas, pathprof.CORINE_TO_P452_CLASSES)
+            for (frecuencia, altura), salida in salidas.items():
+                salida[fila:fila + alto] = mapa_perdida_clutter(zonas, frecuencia, altura, dtype=np.float16)
+        manifiesto = {
+            "huella": huella,
+            "origen": os.path.abspath(ruta_zonas),
+            "crs": src.crs.to_wkt() if src.crs else None,
+            "transform": list(src.transform)[:6],
+            "forma": [src.height, src.width],
+            "rasters": [
+                {"frecuencia_GHz": frecuencia, "altura_m": altura, "archivo": nombre_raster(frecuencia, altura)}
+                for frecuencia, altura in combinaciones
+            ],
+        }
+
+    for salida in salidas.values():
+        salida.flush()
+    salidas.clear()
+    # Los rasters y el manifiesto se reemplazan al final: una ejecución interrumpida no deja un manifiesto válido
+    for frecuencia, altura in combinaciones:
+        ruta = os.path.join(directorio, nombre_raster(frecuencia, altura))
+        os.replace(ruta + ".tmp", ruta)
+    temporal = ruta_manifiesto + ".tmp"
+    with open(temporal, "w") as f:
+        json.dump(manifiesto, f, indent=2)
+    os.replace(temporal, ruta_manifiesto)
+    _borrar_obsoletos(directorio, manifiesto)
+    return manifiesto
+
+def _borrar_obsoletos(directorio, manifiesto):
+    """Borra los rasters (y temporales) de precálculos anteriores que no están en el manifiesto."""
+    vigentes = {r["archivo"] for r in manifiesto["rasters"]}
+    for entrada in os.scandir(directorio):
+        nombre = entrada.name
+        if nombre.startswith("perdida_") and nombre.endswith((".npy", ".npy.tmp")) and nombre not in vigentes:
+            try:
+                os.remove(entrada.path)
+            except FileNotFoundError:
+                pass
+
+class PerdidasClutterPrecalculadas:
+    """Lectura de los rasters de `precalcular`: la pérdida de un enlace es una lectura de píxel.
+
+    Los .npy se abren como memmap la primera vez que se piden, así solo se
+    leen del disco las páginas de los píxeles consultados.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        with open(os.path.join(directorio, MANIFIESTO)) as f:
+            self.manifiesto = json.load(f)
+        self.transform = Affine(*self.manifiesto["transform"])
+        self._inversa = ~self.transform
+        self.forma = tuple(self.manifiesto["forma"])
+        self._archivos = {
+            (r["frecuencia_GHz"], r["altura_m"]): r["archivo"] for r in self.manifiesto["rasters"]
+        }
+        self._rasters = {}
+
+    def combinaciones(self):
+        """Pares (frecuencia GHz, altura m o None) disponibles."""
+        return list(self._archivos)
+
+    def raster(self, frecuencia, altura=None):
+        """Raster completo (memmap float16) de una frecuencia y altura precalculadas."""
+        clave = (float(frecuencia), None if altura is None else float(altura))
+        if clave not in self._rasters:
+            if clave not in self._archivos:
+                raise KeyError(f"No hay pérdidas precalculadas para {clave[0]:g} GHz y altura {altura}")
+            self._rasters[clave] = np.load(os.path.join(self.directorio, self._archivos[clave]), mmap_mode="r")
+        return self._rasters[clave]
+
+    def perdidas(self, lons, lats, frecuencia, altura=None):
+        """Pérdida (dB) en arreglos de puntos del CRS del raster; NaN fuera de él."""
+        raster = self.raster(frecuencia, altura)
+        lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+        columnas = np.floor(self._inversa.a * lons + self._inversa.b * lats + self._inversa.c).astype(np.intp)
+        filas = np.floor(self._inversa.d * lons + self._inversa.e * lats + self._inversa.f).astype(np.intp)
+        dentro = (filas >= 0) & (filas < self.forma[0]) & (columnas >= 0) & (columnas < self.forma[1])
+        resultado = np.full(lons.shape, np.nan)
+        resultado[dentro] = raster[filas[dentro], columnas[dentro]]
+        return resultado
+
+    def perdida(self, lon, lat, frecuencia, altura=None):
+        """Pérdida (dB) en un punto, o None fuera del raster."""
+        raster = self.raster(frecuencia, altura)
+        inversa = self._inversa
+        columna = math.floor(inversa.a * lon + inversa.b * lat + inversa.c)
+        fila = math.floor(inversa.d * lon + inversa.e * lat + inversa.f)
+        if 0 <= fila < self.forma[0] and 0 <= columna < self.forma[1]:
+            return float(raster[fila, columna])
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precalcula rasters de pérdida por clutter (ITU-R P.452)")
+    parser.add_argument("ruta_zonas", help="GeoTIFF Corine (o de zonas P.452 con --p452)")
+    parser.add_argument("directorio", help="Directorio de salida de los rasters y el manifiesto")
+    parser.add_argument("--frecuencias", type=float, nargs="+", required=True, help="Frecuencias en GHz")
+    parser.add_argument("--alturas", type=float, nargs="*", default=[], help="Alturas de antena en m (por defecto la nominal)")
+    parser.add_argument("--p452", action="store_true", help="El raster ya contiene zonas P.452")
+    args = parser.parse_args()
+
+    manifiesto = precalcular(args.ruta_zonas, args.directorio, args.frecuencias, args.alturas or [None], not args.p452)
+    for raster in manifiesto["rasters"]:
+        print(os.path.join(args.directorio, raster["archivo"]))
@@ -1,9 +1,17 @@
 # Se importan las bibliotecas necesarias para el cálculo y la visualización.
+import sys
 from pycraf import pathprof, conversions as cnv
 import astropy.units as u
-import matplotlib.pyplot as plt
+import matplotlib
 import numpy as np
 
+# Si se indica un archivo de salida (python AtenuacionEnElVacio.py grafica.png) la gráfica se guarda
+# con el backend Agg, que no necesita pantalla; si no, se muestra en una ventana.
+ruta_salida = sys.argv[1] if len(sys.argv) > 1 else None
+if ruta_salida:
+    matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
 # Se definen los parámetros de la simulación.
 frecuencia = 0.850 * u.GHz  # Se establece la frecuencia de la señal en GHz.
 distancias = np.linspace(1, 100, 100) * u.km  # Se crea un arreglo de distancias desde 1 hasta 100 km.
@@ -19,4 +27,8 @@ plt.xlabel('Distancia (km)')  # Se etiqueta el eje X.
 plt.ylabel('Atenuación (dB)')  # Se etiqueta el eje Y.
 plt.grid(True)  # Se habilita la cuadrícula en la gráfica.
 plt.legend()  # Se muestra la leyenda.
-plt.show()  # Se visualiza la gráfica.
\ No newline at end of file
+if ruta_salida:
+    plt.savefig(ruta_salida)  # Se guarda la gráfica (PNG, SVG, ... según la extensión).
+    plt.close()  # Se libera la figura.
+else:
+    plt.show()  # Se visualiza la gráfica.
\ No newline at end of file
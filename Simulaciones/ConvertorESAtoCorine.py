@@ -1,12 +1,10 @@
 # Se importan las bibliotecas necesarias para el procesamiento de datos raster.
 import rasterio
+from rasterio.windows import Window
 import numpy as np
 
-# Se carga el archivo GeoTIFF de ESA WorldCover.
-archivo_esa = 'ESA_WorldCover_10m_2021_v200_N36W123_Map.tif'  # Se define la ruta del archivo GeoTIFF.
-with rasterio.open(archivo_esa) as src:
-    esa_map = src.read(1)  # Se lee la primera banda del archivo.
-    profile = src.profile  # Se guarda el perfil del archivo (metadatos).
+# Se define la ruta del archivo GeoTIFF de ESA WorldCover.
+archivo_esa = 'ESA_WorldCover_10m_2021_v200_N36W123_Map.tif'
 
 # Se define la tabla de reclasificación de ESA WorldCover a Corine Land Cover.
 reclass_table = {
@@ -23,17 +21,25 @@ reclass_table = {
     100: 322  # Musgos/líquenes -> Matorrales
 }
 
-# Se crea un mapa vacío para almacenar los valores reclasificados.
-corine_map = np.zeros_like(esa_map, dtype=np.int16)
-
-# Se aplica la reclasificación utilizando la tabla definida.
+# Se construye una tabla de consulta (LUT) indexada por el valor ESA (uint8).
+# Los valores sin equivalencia quedan en 0, igual que con la reclasificación por máscaras.
+lut = np.zeros(256, dtype=np.int16)
 for esa_value, corine_value in reclass_table.items():
-    corine_map[esa_map == esa_value] = corine_value
+    lut[esa_value] = corine_value
 
-# Se guarda el archivo reclasificado como un nuevo GeoTIFF.
+# Se reclasifica el archivo por franjas de filas y se guarda como un GeoTIFF teselado y comprimido.
+# Solo una franja está en memoria a la vez y cada píxel se reclasifica con una sola consulta a la LUT.
 archivo_corine = 'ESA_WorldCoverSanFrancisco_reclassified_to_Corine.tif'
-with rasterio.open(archivo_corine, 'w', **profile) as dst:
-    dst.write(corine_map, 1)  # Se escribe la banda reclasificada en el nuevo archivo.
+alto_franja = 512  # Se usa el mismo tamaño que las teselas de salida.
+with rasterio.open(archivo_esa) as src:
+    profile = src.profile  # Se guarda el perfil del archivo (metadatos).
+    profile.update(dtype=np.int16, tiled=True, blockxsize=alto_franja, blockysize=alto_franja,
+                   compress='deflate', predictor=2, BIGTIFF='IF_SAFER')
+    with rasterio.open(archivo_corine, 'w', **profile) as dst:
+        for fila in range(0, src.height, alto_franja):
+            ventana = Window(0, fila, src.width, min(alto_franja, src.height - fila))
+            esa_map = src.read(1, window=ventana)  # Se lee una franja de la primera banda.
+            dst.write(lut[esa_map], 1, window=ventana)  # Se escribe la franja reclasificada.
 
 # Se imprime un mensaje indicando que el archivo ha sido guardado.
 print(f"Archivo reclasificado guardado como: {archivo_corine}")
\ No newline at end of file
@@ -1,13 +1,26 @@
 # Se importan las bibliotecas necesarias para el procesamiento de datos raster, cálculos de propagación y visualización.
+import os
+import sys
 import rasterio
 from pycraf import pathprof
 import numpy as np
+import matplotlib
+
+# Si se indica un archivo de salida (python GraficaPerdidasVsDistancia.py grafica.png) la gráfica se guarda
+# con el backend Agg, que no necesita pantalla; si no, se muestra en una ventana.
+ruta_salida = sys.argv[1] if len(sys.argv) > 1 else None
+if ruta_salida:
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from astropy import units as u
 from pyproj import Geod
 
-# Se configura la descarga automática de archivos de altura de terreno faltantes.
-pathprof.SrtmConf.set(download='missing')
+# Se configura el origen de los archivos de altura de terreno: si SRTM_LOCAL indica un directorio de
+# teselas .hgt se usan solo esas (equipos sin red); si no, se descargan automáticamente las faltantes.
+if os.environ.get('SRTM_LOCAL'):
+    pathprof.SrtmConf.set(srtm_dir=os.environ['SRTM_LOCAL'], download='never')
+else:
+    pathprof.SrtmConf.set(download='missing')
 
 # 1. Se carga el archivo GeoTIFF de zonas de clutter reclasificado.
 archivo_clutter = 'ESA_WorldCoverSanFrancisco_reclassified_to_Corine.tif'  # Se define la ruta del archivo GeoTIFF.
@@ -98,6 +111,10 @@ if len(perdidas) == len(distancias):
     plt.ylabel('Atenuación (dB)')
     plt.grid(True)
     plt.legend()
-    plt.show()
+    if ruta_salida:
+        plt.savefig(ruta_salida)  # Se guarda la gráfica (PNG, SVG, ... según la extensión).
+        plt.close()  # Se libera la figura.
+    else:
+        plt.show()
 else:
     print(f"Error: las longitudes de distancias y perdidas no coinciden. Distancias: {len(distancias)}, Pérdidas: {len(perdidas)}")
\ No newline at end of file
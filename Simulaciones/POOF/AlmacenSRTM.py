@@ -0,0 +1,196 @@
+import argparse
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+import numpy as np
+from pyproj import Geod
+
+# Nombre de las teselas SRTM: esquina suroeste, p. ej. N37W123.hgt
+PATRON_TESELA = re.compile(r'^([NS])(\d{2})([EW])(\d{3})\.hgt$', re.IGNORECASE)
+
+# Valor de las celdas sin dato en los archivos .hgt
+SIN_DATO_HGT = -32768
+
+def nombre_tesela(ilon, ilat):
+    """Nombre del archivo .hgt cuya esquina suroeste es (ilon, ilat)."""
+    return f"{'N' if ilat >= 0 else 'S'}{abs(ilat):02d}{'E' if ilon >= 0 else 'W'}{abs(ilon):03d}.hgt"
+
+def generar_tesela_sintetica(directorio, ilon, ilat, tamano=1201, semilla=0):
+    """Escribe una tesela .hgt con relieve sintético (suma de ondas) y devuelve su ruta.
+
+    El relieve es continuo entre teselas vecinas porque depende solo de las
+    coordenadas y de `semilla`, así sirve para pruebas y mediciones sin red.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    rng = np.random.default_rng(semilla)
+    frecuencias = rng.uniform(2., 400., size=(6, 2))
+    fases = rng.uniform(0., 2 * np.pi, size=6)
+    amplitudes = 400. / np.arange(1, 7)
+
+    lats = (ilat + 1 - np.arange(tamano) / (tamano - 1))[:, None]
+    lons = (ilon + np.arange(tamano) / (tamano - 1))[None, :]
+    alturas = np.full((tamano, tamano), 600.)
+    for (f_lon, f_lat), fase, amplitud in zip(frecuencias, fases, amplitudes):
+        alturas += amplitud * np.sin(f_lon * lons + f_lat * lats + fase)
+
+    ruta = os.path.join(directorio, nombre_tesela(ilon, ilat))
+    np.clip(np.rint(alturas), -500, 8000).astype('>i2').tofile(ruta)
+    return ruta
+
+class AlmacenSRTM:
+    """Teselas SRTM (.hgt) locales, sin red.
+
+    El directorio se indexa una sola vez al crear el almacén. Las teselas se
+    abren como memmap (big-endian int16) cuando se necesitan y se mantienen
+    abiertas como mucho `max_abiertas`, desalojando la usada hace más tiempo.
+    Las alturas se interpolan de forma bilineal, como con `interp='linear'`
+    en pycraf; fuera de las teselas disponibles o en celdas sin dato el
+    resultado es NaN.
+    """
+
+    def __init__(self, directorio, max_abiertas=16):
+        self.directorio = directorio
+        self.max_abiertas = max_abiertas
+        self.geod = Geod(ellps='WGS84')
+        self._abiertas = OrderedDict()
+        self.aperturas = 0
+        self.indexar()
+
+    def indexar(self):
+        """Recorre el directorio (y subdirectorios) y registra las teselas por su esquina suroeste."""
+        self.indice = {}
+        tamanos = set()
+        for raiz, _, archivos in os.walk(self.directorio):
+            for archivo in archivos:
+                coincidencia = PATRON_TESELA.match(archivo)
+                if coincidencia is None:
+                    continue
+                ns, lat, ew, lon = coincidencia.groups()
+                clave = (int(lon) * (-1 if ew.upper() == 'W' else 1), int(lat) * (-1 if ns.upper() == 'S' else 1))
+                ruta = os.path.join(raiz, archivo)
+                self.indice[clave] = ruta
+                tamanos.add(os.path.getsize(ruta))
+        if len(tamanos) > 1:
+            raise ValueError("Todas las teselas del directorio deben tener el mismo tamaño")
+        self.tamano = int(round(math.sqrt(tamanos.pop() / 2))) if tamanos else None
+        # Resolución aproximada en metros (3" -> 90 m, 1" -> 30 m), como SrtmConf.hgt_res
+        self.hgt_res = 90. * 1200 / (self.tamano - 1) if self.tamano else None
+        self._abiertas.clear()
+
+    def __getstate__(self):
+        # Las teselas abiertas no se copian a otros procesos: cada uno abre las suyas
+        estado = self.__dict__.copy()
+        estado['_abiertas'] = OrderedDict()
+        return estado
+
+    def fuente(self):
+        """Identifica los datos del almacén (para claves de caché)."""
+        return ('almacen', os.path.abspath(self.directorio), self.tamano)
+
+    def _tesela(self, clave):
+        tesela = self._abiertas.get(clave)
+        if tesela is not None:
+            self._abiertas.move_to_end(clave)
+            return tesela
+        tesela = np.memmap(self.indice[clave], dtype='>i2', mode='r', shape=(self.tamano, self.tamano))
+        self.aperturas += 1
+        self._abiertas[clave] = tesela
+        if len(self._abiertas) > self.max_abiertas:
+            self._abiertas.popitem(last=False)
+        return tesela
+
+    def alturas(self, lons, lats):
+        """Alturas (m) de arreglos de puntos en grados, con interpolación bilineal."""
+        lons, lats = np.broadcast_arrays(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        forma = lons.shape
+        lons, lats = lons.ravel(), lats.ravel()
+        resultado = np.full(lons.shape, np.nan)
+        if self.tamano is None:
+            return resultado.reshape(forma)
+
+        ilons, ilats = np.floor(lons).astype(int), np.floor(lats).astype(int)
+        # Posición dentro de la tesela: columnas hacia el este, filas hacia el sur
+        ultimo = self.tamano - 1
+        x = (lons - ilons) * ultimo
+        y = (ilats + 1 - lats) * ultimo
+        columnas = np.minimum(x.astype(int), ultimo - 1)
+        filas = np.minimum(y.astype(int), ultimo - 1)
+        dx, dy = x - columnas, y - filas
+
+        # Los puntos se agrupan por tesela: cada tesela se consulta una vez por llamada
+        ids = (ilons + 180) * 1000 + (ilats + 90)
+        orden = np.argsort(ids, kind='stable')
+        cortes = np.flatnonzero(np.diff(ids[orden])) + 1
+        for grupo in np.split(orden, cortes):
+            if grupo.size == 0:
+                continue
+            clave = (int(ilons[grupo[0]]), int(ilats[grupo[0]]))
+            if clave not in self.indice:
+                continue
+            tesela = self._tesela(clave)
+            f, c = filas[grupo], columnas[grupo]
+            esquinas = np.stack([tesela[f, c], tesela[f, c + 1], tesela[f + 1, c], tesela[f + 1, c + 1]]).astype(float)
+            esquinas[esquinas == SIN_DATO_HGT] = np.nan
+            ax, ay = dx[grupo], dy[grupo]
+            resultado[grupo] = (esquinas[0] * (1 - ax) * (1 - ay) + esquinas[1] * ax * (1 - ay)
+                                + esquinas[2] * (1 - ax) * ay + esquinas[3] * ax * ay)
+        return resultado.reshape(forma)
+
+    def perfil(self, lon_t, lat_t, lon_r, lat_r, paso=None):
+        """Perfil de alturas sobre la geodésica entre dos puntos (grados), como srtm_height_profile.
+
+        Devuelve el mismo dict que `CachePerfiles.perfil`; con `paso` None se
+        usa hgt_res / 3.
+        """
+        if self.tamano is None:
+            raise FileNotFoundError(f"No hay teselas .hgt en {self.directorio}")
+        paso = self.hgt_res / 3. if paso is None else float(paso)
+        bearing, _, distancia = self.geod.inv(lon_t, lat_t, lon_r, lat_r)
+        distancias = np.arange(0., distancia + paso, paso)
+        lons, lats, _ = self.geod.fwd(np.full(distancias.shape, lon_t), np.full(distancias.shape, lat_t),
+                                      np.full(distancias.shape, bearing), distancias)
+        alturas = self.alturas(lons, lats)
+        if np.isnan(alturas).any():
+            raise ValueError("El perfil pasa por zonas sin teselas o sin datos de altura")
+        return {'distancias': distancias, 'alturas': alturas, 'bearing': bearing % 360,
+                'paso': paso, 'hgt_res': self.hgt_res}
+
+    def configurar_pycraf(self):
+        """Hace que pycraf lea estas mismas teselas y nunca intente descargarlas."""
+        from pycraf import pathprof
+        pathprof.SrtmConf.set(srtm_dir=self.directorio, download='never')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teselas SRTM locales: generación sintética y medición de consultas")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    generar = subcomandos.add_parser("generar", help="Escribe teselas sintéticas para un rango de grados")
+    generar.add_argument("directorio")
+    generar.add_argument("--lon", type=int, nargs=2, required=True, metavar=("OESTE", "ESTE"))
+    generar.add_argument("--lat", type=int, nargs=2, required=True, metavar=("SUR", "NORTE"))
+    generar.add_argument("--tamano", type=int, default=1201, help="1201 (3\") o 3601 (1\")")
+    generar.add_argument("--semilla", type=int, default=0)
+    medir = subcomandos.add_parser("medir", help="Mide consultas de altura sobre las teselas del directorio")
+    medir.add_argument("directorio")
+    medir.add_argument("--puntos", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if args.comando == "generar":
+        for ilon in range(args.lon[0], args.lon[1]):
+            for ilat in range(args.lat[0], args.lat[1]):
+                print(generar_tesela_sintetica(args.directorio, ilon, ilat, args.tamano, args.semilla))
+    else:
+        almacen = AlmacenSRTM(args.directorio)
+        if not almacen.indice:
+            parser.error(f"No hay teselas .hgt en {args.directorio}")
+        claves = np.array(list(almacen.indice))
+        rng = np.random.default_rng(0)
+        elegidas = claves[rng.integers(len(claves), size=args.puntos)]
+        lons = elegidas[:, 0] + rng.random(args.puntos)
+        lats = elegidas[:, 1] + rng.random(args.puntos)
+        inicio = time.perf_counter()
+        alturas = almacen.alturas(lons, lats)
+        segundos = time.perf_counter() - inicio
+        print(f"{len(almacen.indice)} teselas, {args.puntos} puntos en {segundos:.3f} s "
+              f"({args.puntos / segundos:,.0f} puntos/s, {almacen.aperturas} aperturas)")
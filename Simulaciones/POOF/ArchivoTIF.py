@@ -1,14 +1,33 @@
 import rasterio
-import matplotlib.pyplot as plt
+import math
 import numpy as np
 import rasterio
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+import Instrumentacion
+from Reclasificador import Reclasificador
 
 class ArchivoTIF:
-    def __init__(self, ruta_archivo):
+    # A partir de este tamaño (en píxeles) el archivo se abre en modo perezoso
+    UMBRAL_PIXELES_PEREZOSO = 100_000_000
+    # Tamaño aproximado (en píxeles) de cada franja leída al recorrer el archivo por bloques
+    PIXELES_POR_BLOQUE = 16_000_000
+
+    def __init__(self, ruta_archivo, perezoso=None):
+        """`perezoso`: True/False fuerza el modo; None lo decide según el tamaño del archivo."""
         self.ruta_archivo = ruta_archivo
+        self.perezoso = perezoso
+        self.src = None
         self.datos = None
         self.transform = None
         self.bounds = None
+        self.forma = None
+        self.res = None
+        self.crs = None
+        self.alto_bloque = None
+        self.ancho_bloque = None
+        self._zonas_p452 = None
+        self._origen_zonas_p452 = None
         self.corine_colors = {
             111: ('red', 'Tejido urbano continuo'),
             211: ('yellowgreen', 'Tierras de cultivo no irrigadas'),
@@ -31,137 +50,263 @@ class ArchivoTIF:
         }
 
     def cargar_archivo(self):
-        """Carga el archivo TIF."""
-        with rasterio.open(self.ruta_archivo) as src:
-            self.datos = src.read(1)
+        """Carga el archivo TIF.
+
+        En modo perezoso solo se leen los metadatos y se mantiene abierto el
+        dataset; los píxeles se leen por ventanas cuando se necesitan.
+        """
+        self.cerrar()
+        self._zonas_p452 = None
+        with Instrumentacion.etapa("ArchivoTIF.cargar_archivo") as medicion:
+            src = rasterio.open(self.ruta_archivo)
             self.transform = src.transform
             self.bounds = src.bounds
+            self.forma = (src.height, src.width)
+            self.res = src.res
+            self.crs = src.crs
+            self.alto_bloque, self.ancho_bloque = src.block_shapes[0]
 
-    def visualizar_archivo(self):
-        """Visualiza el archivo TIF con colores personalizados."""
-        if self.datos is None:
-            print("Error: No se ha cargado ningún archivo.")
-            return
+            if self.perezoso is None:
+                self.perezoso = src.height * src.width > self.UMBRAL_PIXELES_PEREZOSO
+            if self.perezoso:
+                self.src = src
+                self.datos = None
+            else:
+                with src:
+                    self.datos = src.read(1)
+                medicion.bytes = self.datos.nbytes
 
-        # Verificar valores únicos y asignar colores
-        valores_unicos = np.unique(self.datos)
-        for value in valores_unicos:
-            if value not in self.corine_colors:
-                self.corine_colors[value] = ('darkgray', f'Desconocido ({value})')
+    def cerrar(self):
+        """Cierra el dataset abierto en modo perezoso."""
+        if self.src is not None:
+            self.src.close()
+            self.src = None
+
+    def esta_cargado(self):
+        """Indica si hay un archivo cargado (en memoria o en modo perezoso)."""
+        return self.transform is not None
+
+    def leer_ventana(self, fila, columna, alto, ancho):
+        """Lee una ventana de la banda 1, recortada a los límites del archivo."""
+        fila_fin = min(fila + alto, self.forma[0])
+        columna_fin = min(columna + ancho, self.forma[1])
+        fila, columna = max(fila, 0), max(columna, 0)
+        if self.datos is not None:
+            return self.datos[fila:fila_fin, columna:columna_fin]
+        with Instrumentacion.etapa("ArchivoTIF.leer_ventana") as medicion:
+            ventana = self.src.read(1, window=Window(columna, fila, columna_fin - columna, fila_fin - fila))
+            medicion.bytes = ventana.nbytes
+        return ventana
+
+    def leer_pixel(self, fila, columna):
+        """Valor de un píxel; None si está fuera de los límites."""
+        if not (0 <= fila < self.forma[0] and 0 <= columna < self.forma[1]):
+            return None
+        return self.leer_ventana(fila, columna, 1, 1)[0, 0]
+
+    def leer_pixeles(self, filas, columnas):
+        """Valores de muchos píxeles a la vez; todos los índices deben estar dentro del archivo.
+
+        En modo perezoso los puntos se agrupan por bloque interno del GeoTIFF
+        y cada bloque con algún punto se lee una sola vez.
+        """
+        filas, columnas = np.asarray(filas, dtype=np.intp), np.asarray(columnas, dtype=np.intp)
+        if self.datos is not None:
+            return self.datos[filas, columnas]
 
-        # Crear imagen con colores personalizados
-        corine_image = np.zeros((self.datos.shape[0], self.datos.shape[1], 3), dtype=np.uint8)
+        valores = np.empty(filas.shape, dtype=self.src.dtypes[0])
+        alto_bloque, ancho_bloque = self.alto_bloque or 1, self.ancho_bloque or self.forma[1]
+        bloques_por_fila = -(-self.forma[1] // ancho_bloque)
+        ids = (filas // alto_bloque) * bloques_por_fila + columnas // ancho_bloque
+        orden = np.argsort(ids.ravel(), kind='stable')
+        ids_ordenados = ids.ravel()[orden]
+        cortes = np.flatnonzero(np.diff(ids_ordenados)) + 1
+        for grupo in np.split(orden, cortes):
+            if grupo.size == 0:
+                continue
+            id_bloque = int(ids.flat[grupo[0]])
+            fila0 = id_bloque // bloques_por_fila * alto_bloque
+            columna0 = id_bloque % bloques_por_fila * ancho_bloque
+            bloque = self.leer_ventana(fila0, columna0, alto_bloque, ancho_bloque)
+            valores.flat[grupo] = bloque[filas.flat[grupo] - fila0, columnas.flat[grupo] - columna0]
+        return valores
+
+    def iterar_bloques(self, filas_por_bloque=None):
+        """Recorre el archivo en franjas horizontales completas: genera (fila_inicio, bloque).
+
+        Las franjas tienen un múltiplo del alto de bloque interno del archivo,
+        así cada bloque del GeoTIFF se lee una sola vez y la memoria queda acotada.
+        """
+        if filas_por_bloque is None:
+            alto_bloque = self.alto_bloque or 1
+            filas_por_bloque = max(alto_bloque, self.PIXELES_POR_BLOQUE // self.forma[1] // alto_bloque * alto_bloque)
+        for fila in range(0, self.forma[0], filas_por_bloque):
+            yield fila, self.leer_ventana(fila, 0, filas_por_bloque, self.forma[1])
+
+    def obtener_datos(self):
+        """Devuelve la banda completa (en modo perezoso la lee del disco)."""
+        if self.datos is not None:
+            return self.datos
+        with Instrumentacion.etapa("ArchivoTIF.leer_banda") as medicion:
+            datos = self.src.read(1)
+            medicion.bytes = datos.nbytes
+        return datos
+
+    def obtener_zonas_p452(self):
+        """Zonas de clutter P.452 de la banda completa, convertidas una sola vez.
+
+        La conversión se guarda y se reutiliza mientras no cambien los datos:
+        se invalida al recargar el archivo o al reemplazar `datos` (las
+        modificaciones en el lugar del arreglo no se detectan).
+        """
+        from pycraf import pathprof
+
+        origen = self.datos if self.datos is not None else self.ruta_archivo
+        if self._zonas_p452 is None or self._origen_zonas_p452 is not origen:
+            with Instrumentacion.etapa("ArchivoTIF.zonas_p452"):
+                self._zonas_p452 = pathprof.landcover_to_p452_clutter_zones(
+                    self.obtener_datos(), pathprof.CORINE_TO_P452_CLASSES
+                )
+            self._origen_zonas_p452 = origen
+        return self._zonas_p452
+
+    def leer_vista(self, alto_max, ancho_max, fila=0, columna=0, alto=None, ancho=None):
+        """Lee una ventana reducida a lo sumo a `alto_max` x `ancho_max` píxeles (vecino más cercano).
+
+        Devuelve (datos, extent) con el extent en coordenadas de píxel del
+        archivo completo, listo para `imshow`. Si la ventana cabe en el tamaño
+        pedido se lee a resolución completa.
+        """
+        alto = self.forma[0] - fila if alto is None else alto
+        ancho = self.forma[1] - columna if ancho is None else ancho
+        fila_fin, columna_fin = min(fila + alto, self.forma[0]), min(columna + ancho, self.forma[1])
+        fila, columna = max(fila, 0), max(columna, 0)
+        alto, ancho = fila_fin - fila, columna_fin - columna
+        paso = max(1, math.ceil(alto / alto_max), math.ceil(ancho / ancho_max))
+
+        if self.datos is not None:
+            # En memoria: submuestreo por saltos, sin copiar la banda
+            datos = self.datos[fila:fila_fin:paso, columna:columna_fin:paso]
+            extent = (columna, columna + datos.shape[1] * paso, fila + datos.shape[0] * paso, fila)
+        else:
+            # Perezoso: GDAL usa las vistas generales (overviews) del archivo si existen
+            datos = self.src.read(1, window=Window(columna, fila, ancho, alto),
+                                  out_shape=(math.ceil(alto / paso), math.ceil(ancho / paso)),
+                                  resampling=Resampling.nearest)
+            extent = (columna, columna_fin, fila_fin, fila)
+        return datos, extent
+
+    def construir_paleta(self):
+        """Paleta RGB indexada por código de clase; la última entrada es para códigos desconocidos."""
+        from matplotlib.colors import to_rgb
+        desconocido = np.array(to_rgb('darkgray')) * 255
+        codigos = [codigo for codigo in self.corine_colors if codigo >= 0]
+        paleta = np.empty((max(codigos) + 2, 3), dtype=np.uint8)
+        paleta[:] = desconocido
         for value, (color, _) in self.corine_colors.items():
-            mask = (self.datos == value)
+            if value < 0:
+                continue
             try:
-                corine_image[mask] = np.array(plt.cm.colors.to_rgb(color)) * 255
+                paleta[value] = np.array(to_rgb(color)) * 255
             except ValueError:
                 print(f"Advertencia: El color '{color}' no es válido. Usando 'darkgray' en su lugar.")
-                corine_image[mask] = np.array(plt.cm.colors.to_rgb('darkgray')) * 255
+        return paleta
+
+    def colorear(self, datos, paleta):
+        """Convierte códigos de clase a RGB con una sola consulta a la paleta."""
+        indices = datos.astype(np.intp)
+        indices[(indices < 0) | (indices >= len(paleta) - 1)] = len(paleta) - 1
+        return paleta[indices]
+
+    def visualizar_archivo(self):
+        """Visualiza el archivo TIF con colores personalizados.
+
+        Se dibuja una vista reducida al tamaño de la figura; al hacer zoom se
+        vuelve a leer solo la zona visible, a resolución completa cuando cabe.
+        """
+        if not self.esta_cargado():
+            print("Error: No se ha cargado ningún archivo.")
+            return
+
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=(12, 8))
+        ancho_max, alto_max = (int(v) for v in fig.get_size_inches() * fig.dpi)
+        datos, extent = self.leer_vista(alto_max, ancho_max)
+
+        # Valores sin color definido (se buscan en la vista, no en la banda completa)
+        for value in np.unique(datos).tolist():
+            if value not in self.corine_colors:
+                self.corine_colors[value] = ('darkgray', f'Desconocido ({value})')
+        paleta = self.construir_paleta()
 
         # Mostrar el mapa
-        plt.figure(figsize=(12, 8))
-        plt.imshow(corine_image)
-        plt.axis('off')
+        imagen = ax.imshow(self.colorear(datos, paleta), extent=extent, interpolation='nearest')
+        ax.set_autoscale_on(False)
+        ax.axis('off')
+        vista_actual = [extent]
+
+        def actualizar_vista(_ax):
+            (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+            columna, fila = max(0, math.floor(x0)), max(0, math.floor(y0))
+            columna_fin, fila_fin = min(self.forma[1], math.ceil(x1)), min(self.forma[0], math.ceil(y1))
+            if columna_fin <= columna or fila_fin <= fila:
+                return
+            datos, extent = self.leer_vista(alto_max, ancho_max, fila, columna, fila_fin - fila, columna_fin - columna)
+            if extent == vista_actual[0]:
+                return
+            vista_actual[0] = extent
+            imagen.set_data(self.colorear(datos, paleta))
+            imagen.set_extent(extent)
+            fig.canvas.draw_idle()
+
+        ax.callbacks.connect('xlim_changed', actualizar_vista)
+        ax.callbacks.connect('ylim_changed', actualizar_vista)
 
         # Crear leyenda
         handles = [plt.Line2D([0], [0], marker='o', color='w', markerfacecolor=color, markersize=10, label=label)
                   for value, (color, label) in self.corine_colors.items()]
-        plt.legend(handles=handles, bbox_to_anchor=(1.05, 1), loc='upper left', title='Categorías de Corine Land Cover')
+        ax.legend(handles=handles, bbox_to_anchor=(1.05, 1), loc='upper left', title='Categorías de Corine Land Cover')
 
-        plt.title('Mapa de Corine Land Cover')
+        ax.set_title('Mapa de Corine Land Cover')
         plt.show()
 
 
     def calcular_areas_utiles(self):
         """Calcula el área de cada categoría en el archivo TIF."""
-        if self.datos is None:
+        if not self.esta_cargado():
             print("Error: No se ha cargado ningún archivo.")
             return
 
-        # Obtener la resolución espacial (tamaño de cada píxel en metros)
-        with rasterio.open(self.ruta_archivo) as src:
-            res_x, res_y = src.res  # Resolución en metros (x, y)
-
-        # Calcular el área de cada píxel en metros cuadrados
-        area_pixel = abs(res_x * res_y)
-
-        # Contar píxeles por categoría y calcular áreas
-        valores_unicos, conteos = np.unique(self.datos, return_counts=True)
-        areas = {value: conteos[i] * area_pixel for i, value in enumerate(valores_unicos)}
+        # Área geodésica por categoría, acumulada franja a franja (pyproj se carga solo para esta opción)
+        from CalculadoraAreas import CalculadoraAreas
+        areas = CalculadoraAreas(self).calcular()
 
-        # Mostrar resultados
-        print("\nÁreas útiles por categoría (en metros cuadrados):")
+        # Mostrar resultados; sin CRS las áreas quedan en las unidades de la transformación
+        if self.crs is None:
+            print("\nÁreas útiles por categoría (en unidades del mapa², el archivo no tiene CRS):")
+            unidad = "unidades del mapa²"
+        else:
+            print("\nÁreas útiles por categoría (en metros cuadrados):")
+            unidad = "m²"
         for value, area in areas.items():
             nombre_categoria = self.corine_colors.get(value, ("Desconocido", f"Categoría {value}"))[1]
-            print(f"{nombre_categoria}: {area:.2f} m²")
+            print(f"{nombre_categoria}: {area:.2f} {unidad}")
+        return areas
 
     def convertir_esa_a_corine(self, ruta_salida):
         """Convierte un archivo ESA WorldCover a Corine Land Cover."""
-        # Tabla de reclasificación de ESA a Corine
-        reclass_table = {
-            10: 311,  # Tree cover -> Bosques de hoja ancha
-            20: 322,  # Shrubland -> Matorrales
-            30: 321,  # Grassland -> Pastizales naturales
-            40: 211,  # Cropland -> Tierras de cultivo no irrigadas
-            50: 111,  # Built-up -> Tejido urbano continuo
-            60: 332,  # Bare / sparse vegetation -> Rocas desnudas
-            70: 335,  # Snow and ice -> Glaciares y nieves perpetuas
-            80: 512,  # Permanent water bodies -> Masas de agua
-            90: 411,  # Herbaceous wetland -> Marismas interiores
-            95: 421,  # Mangroves -> Marismas salinas
-            100: 322, # Moss and lichen -> Matorrales
-            0: 512    # Masas de agua -> Masas de agua
-        }
-
-        # Cargar archivo ESA WorldCover
-        with rasterio.open(self.ruta_archivo) as src:
-            esa_map = src.read(1)
-            profile = src.profile
-
-        # Crear un mapa vacío para almacenar los valores reclasificados
-        corine_map = np.zeros_like(esa_map, dtype=np.int16)
-
-        # Aplicar la reclasificación
-        for esa_value, corine_value in reclass_table.items():
-            corine_map[esa_map == esa_value] = corine_value
-
-        # Guardar el archivo reclasificado
-        with rasterio.open(ruta_salida, 'w', **profile) as dst:
-            dst.write(corine_map, 1)
+        # Reclasificación por tabla de consulta, franja a franja (las clases sin equivalencia quedan en 0)
+        Reclasificador(Reclasificador.ESA_A_CORINE, valor_defecto=0).reclasificar_archivo(
+            self.ruta_archivo, ruta_salida
+        )
 
         print(f"Archivo reclasificado guardado como: {ruta_salida}")
         return ruta_salida
 
     def modificar_corine(self, ruta_salida):
         """Modifica el archivo Corine Land Cover para incluir categorías adicionales."""
-        # Tabla de mapeo para categorías adicionales
-        mapeo_adicional = {
-            55: 311,  # Tree cover -> Bosques de hoja ancha
-            65: 211,  # Cropland -> Tierras de cultivo no irrigadas
-            66: 322,  # Shrubland -> Matorrales
-            76: 421,  # Mangroves -> Marismas salinas
-            155: 411  # Herbaceous wetland -> Marismas interiores
-        }
-
-        # Cargar archivo Corine Land Cover
-        with rasterio.open(self.ruta_archivo) as src:
-            corine_map = src.read(1)
-            profile = src.profile
-
-        # Cambiar el tipo de dato a int16 para evitar problemas con valores grandes
-        corine_map = corine_map.astype(np.int16)
-
-        # Aplicar el mapeo adicional
-        for valor_original, valor_corine in mapeo_adicional.items():
-            corine_map[corine_map == valor_original] = valor_corine
-
-        # Actualizar el perfil del archivo para usar int16
-        profile.update(dtype=np.int16)
-
-        # Guardar el archivo modificado
-        with rasterio.open(ruta_salida, 'w', **profile) as dst:
-            dst.write(corine_map, 1)
+        # Las categorías fuera de la tabla de mapeo se conservan (valor_defecto=None)
+        Reclasificador(Reclasificador.CORINE_ADICIONAL).reclasificar_archivo(self.ruta_archivo, ruta_salida)
 
         print(f"Archivo Corine modificado guardado como: {ruta_salida}")
         return ruta_salida
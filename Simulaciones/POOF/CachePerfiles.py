@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import numpy as np
+from astropy import units as u
+from pycraf import pathprof
+
+class CachePerfiles:
+    """Caché en disco de perfiles de alturas SRTM, compartida entre ejecuciones.
+
+    Cada perfil se guarda en un .npz con las alturas en float32 (son alturas
+    interpoladas, pero el redondeo es de menos de un milímetro, muy por
+    debajo de la precisión de SRTM) y se identifica por los extremos, el
+    paso y la fuente de los datos (directorio, servidor e interpolación de
+    SrtmConf). Si el directorio supera `max_bytes` se borran los perfiles
+    usados hace más tiempo (fecha de modificación, que se actualiza en cada
+    acierto). El directorio se recorre solo al abrir la caché; después el
+    orden de uso y el tamaño total se llevan en memoria. Varios procesos
+    pueden compartir el directorio: las escrituras son atómicas.
+    """
+
+    def __init__(self, directorio, max_bytes=512 * 2**20):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        os.makedirs(directorio, exist_ok=True)
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        # ruta -> tamaño en bytes, del usado hace más tiempo al más reciente
+        archivos = []
+        for entrada in os.scandir(directorio):
+            if entrada.name.endswith('.npz'):
+                estado = entrada.stat()
+                archivos.append((estado.st_mtime, entrada.path, estado.st_size))
+        self._indice = OrderedDict((ruta, tamano) for _, ruta, tamano in sorted(archivos))
+        self._bytes = sum(self._indice.values())
+
+    def fuente(self, almacen=None):
+        """Identifica los datos de terreno en uso (un AlmacenSRTM o la configuración de SrtmConf)."""
+        if almacen is not None:
+            return almacen.fuente()
+        configuracion = pathprof.SrtmConf
+        return (os.path.abspath(configuracion.srtm_dir), configuracion.server, configuracion.interp)
+
+    def clave(self, lon_t, lat_t, lon_r, lat_r, paso=None, almacen=None):
+        """Nombre de archivo del perfil; `paso` None es la resolución propia de los datos."""
+        extremos = tuple(round(float(v), 9) for v in (lon_t, lat_t, lon_r, lat_r))
+        paso = 'nativo' if paso is None else round(float(paso), 6)
+        texto = repr((extremos, paso, self.fuente(almacen)))
+        return hashlib.sha1(texto.encode()).hexdigest() + '.npz'
+
+    def perfil(self, lon_t, lat_t, lon_r, lat_r, paso=None, almacen=None):
+        """Perfil entre dos puntos (grados), leído de la caché o extraído y guardado.
+
+        Devuelve un dict con `distancias` y `alturas` (m), `bearing` (grados),
+        `paso` y `hgt_res` (m). Con `paso` None se usa hgt_res / 3, la
+        resolución con la que `srtm_height_profile` consulta los datos. Con
+        `almacen` (AlmacenSRTM) los perfiles nuevos se extraen de las teselas
+        locales en lugar de pycraf.
+        """
+        ruta = os.path.join(self.directorio, self.clave(lon_t, lat_t, lon_r, lat_r, paso, almacen))
+        try:
+            with np.load(ruta) as datos:
+                alturas = datos['alturas'].astype(np.float64)
+                distancia, paso_guardado, bearing, hgt_res = datos['metadatos'].tolist()
+            os.utime(ruta)
+            self._registrar(ruta)
+            self.aciertos += 1
+            return {
+                'distancias': np.arange(0., distancia + paso_guardado, paso_guardado)[:len(alturas)],
+                'alturas': alturas, 'bearing': bearing, 'paso': paso_guardado, 'hgt_res': hgt_res,
+            }
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            pass
+
+        self.fallos += 1
+        if almacen is not None:
+            resultado = almacen.perfil(lon_t, lat_t, lon_r, lat_r, paso)
+            self._guardar(ruta, almacen.geod.inv(lon_t, lat_t, lon_r, lat_r)[2], resultado)
+            return resultado
+        if paso is None:
+            # Se consulta una altura para que SrtmConf conozca la resolución de las teselas
+            pathprof.srtm_height_data(lon_t * u.deg, lat_t * u.deg)
+            paso = pathprof.SrtmConf.hgt_res / 3.
+        _, _, distancia, distancias, alturas, bearing, _, _ = pathprof.srtm_height_profile(
+            lon_t * u.deg, lat_t * u.deg, lon_r * u.deg, lat_r * u.deg, paso * u.m
+        )
+        resultado = {
+            'distancias': distancias.to_value(u.m), 'alturas': alturas.to_value(u.m),
+            'bearing': bearing.to_value(u.deg), 'paso': float(paso), 'hgt_res': float(pathprof.SrtmConf.hgt_res),
+        }
+        self._guardar(ruta, distancia.to_value(u.m), resultado)
+        return resultado
+
+    def _guardar(self, ruta, distancia, resultado):
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'wb') as f:
+            np.savez(
+                f, alturas=resultado['alturas'].astype(np.float32),
+                metadatos=np.array([distancia, resultado['paso'], resultado['bearing'], resultado['hgt_res']]),
+            )
+        os.replace(temporal, ruta)
+        self._registrar(ruta)
+        self._recortar()
+
+    def _registrar(self, ruta):
+        """Marca el perfil como el usado más recientemente (también los que escribió otro proceso)."""
+        tamano = self._indice.pop(ruta, None)
+        if tamano is None:
+            tamano = os.path.getsize(ruta)
+            self._bytes += tamano
+        self._indice[ruta] = tamano
+
+    def _recortar(self):
+        """Borra los perfiles menos usados hasta quedar por debajo de `max_bytes`."""
+        while self._bytes > self.max_bytes and self._indice:
+            ruta, tamano = self._indice.popitem(last=False)
+            self._bytes -= tamano
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                continue  # otro proceso lo borró antes
+            self.desalojos += 1
+
+    def limpiar(self):
+        """Borra todos los perfiles guardados y reinicia los contadores."""
+        for entrada in os.scandir(self.directorio):
+            if entrada.name.endswith('.npz'):
+                os.remove(entrada.path)
+        self._indice.clear()
+        self._bytes = 0
+        self.aciertos = self.fallos = self.desalojos = 0
+
+    def estadisticas(self):
+        """Contadores de aciertos, fallos y desalojos, y ocupación del directorio."""
+        consultas = self.aciertos + self.fallos
+        archivos = [entrada for entrada in os.scandir(self.directorio) if entrada.name.endswith('.npz')]
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "perfiles": len(archivos),
+            "bytes": sum(entrada.stat().st_size for entrada in archivos),
+            "max_bytes": self.max_bytes,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+    def exportar_estadisticas(self, ruta):
+        """Escribe las estadísticas en un archivo JSON."""
+        with open(ruta, "w") as f:
+            json.dump(self.estadisticas(), f, indent=2)
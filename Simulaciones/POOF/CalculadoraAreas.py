@@ -0,0 +1,87 @@
+import numpy as np
+from pyproj import CRS
+
+class CalculadoraAreas:
+    """Área por categoría de un ArchivoTIF, recorriendo el archivo por franjas.
+
+    Cada franja se cuenta con `np.bincount` por (fila, categoría) y los
+    conteos se ponderan con el área real de un píxel de esa fila, calculada
+    una sola vez por fila. El tiempo es lineal en el número de píxeles y la
+    memoria no depende del tamaño del archivo.
+    """
+
+    def __init__(self, archivo_tif):
+        self.archivo_tif = archivo_tif
+
+    def areas_filas(self, fila_inicio, n_filas):
+        """Área en m² de un píxel en cada fila [fila_inicio, fila_inicio + n_filas).
+
+        En CRS geográficos es el área sobre el elipsoide del trapecio entre
+        los paralelos de la fila (fórmula de la latitud autálica); en CRS
+        proyectados es el área plana del píxel en las unidades del CRS. Sin
+        CRS es el área plana del píxel en las unidades de la transformación.
+        """
+        transform = self.archivo_tif.transform
+        if transform.b != 0 or transform.d != 0:
+            raise ValueError("El cálculo de áreas no admite archivos rotados")
+        if self.archivo_tif.crs is None:
+            return np.full(n_filas, abs(transform.a * transform.e))
+        crs = CRS.from_user_input(self.archivo_tif.crs.to_wkt())
+
+        if not crs.is_geographic:
+            factor = crs.axis_info[0].unit_conversion_factor
+            return np.full(n_filas, abs(transform.a * transform.e) * factor ** 2)
+
+        elipsoide = crs.ellipsoid
+        a = elipsoide.semi_major_metre
+        f = 1 / elipsoide.inverse_flattening if elipsoide.inverse_flattening else 0.0
+        e2 = f * (2 - f)
+        e = np.sqrt(e2)
+
+        bordes = transform.f + transform.e * np.arange(fila_inicio, fila_inicio + n_filas + 1)
+        seno = np.sin(np.radians(np.clip(bordes, -90.0, 90.0)))
+        if e == 0:
+            q = 2 * seno
+        else:
+            q = seno / (1 - e2 * seno ** 2) + np.log((1 + e * seno) / (1 - e * seno)) / (2 * e)
+        # Área entre dos paralelos: a²(1 - e²)/2 · Δλ · (q(φ2) - q(φ1))
+        return a ** 2 * (1 - e2) / 2 * np.radians(abs(transform.a)) * np.abs(np.diff(q))
+
+    def calcular(self):
+        """Devuelve {categoría: área en m²}, ordenado por categoría; los píxeles NaN (sin dato) no se cuentan."""
+        categorias = {}  # valor del píxel -> índice compacto
+        codigos = None   # tabla valor -> índice compacto (tipos enteros de 8 y 16 bits)
+        totales = np.zeros(0)
+
+        for fila, bloque in self.archivo_tif.iterar_bloques():
+            n_filas = bloque.shape[0]
+            if codigos is None and bloque.dtype.kind in "ui" and bloque.dtype.itemsize <= 2:
+                codigos = np.full(2 ** (8 * bloque.dtype.itemsize), -1, dtype=np.int64)
+
+            if codigos is not None:
+                sin_signo = bloque.view(f"u{bloque.dtype.itemsize}")
+                # Valores presentes en la franja con una pasada, sin ordenar los píxeles
+                for valor in np.flatnonzero(np.bincount(sin_signo.ravel(), minlength=len(codigos))):
+                    if codigos[valor] < 0:
+                        codigos[valor] = len(categorias)
+                        categorias[np.array(valor, dtype=sin_signo.dtype).view(bloque.dtype).item()] = len(categorias)
+                indices = codigos[sin_signo]
+            else:
+                # Otros tipos de dato: índices por valor distinto de la franja
+                valores, inverso = np.unique(bloque, return_inverse=True)
+                # NaN no sirve como clave de diccionario (cada NaN es distinto): sus píxeles quedan en -1
+                nulos = np.isnan(valores) if valores.dtype.kind in "fc" else np.zeros(len(valores), dtype=bool)
+                for valor in valores[~nulos].tolist():
+                    categorias.setdefault(valor, len(categorias))
+                tabla = np.full(len(valores), -1, dtype=np.int64)
+                tabla[~nulos] = [categorias[v] for v in valores[~nulos].tolist()]
+                indices = tabla[inverso].reshape(bloque.shape)
+
+            # Una columna más por fila para los píxeles sin categoría (-1), que se descarta
+            k = len(categorias)
+            indices = np.where(indices < 0, k, indices) + np.arange(n_filas)[:, None] * (k + 1)
+            conteos = np.bincount(indices.ravel(), minlength=n_filas * (k + 1)).reshape(n_filas, k + 1)[:, :k]
+            totales = np.concatenate([totales, np.zeros(k - len(totales))])
+            totales += self.areas_filas(fila, n_filas) @ conteos
+
+        return {valor: float(totales[indice]) for valor, indice in sorted(categorias.items())}
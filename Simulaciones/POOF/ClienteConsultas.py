@@ -0,0 +1,90 @@
+import json
+import socket
+import time
+
+class ClienteConsultas:
+    """Cliente de ServidorConsultas: consultas sin cargar rasters ni importar pycraf/astropy.
+
+    `direccion` es un puerto TCP en localhost, una tupla (host, puerto) o la
+    ruta de un socket Unix. La conexión se mantiene abierta entre consultas.
+    Tras cada consulta quedan `latencia_servidor_ms` (informada por el
+    servidor) y `latencia_ms` (ida y vuelta medida en el cliente).
+    """
+
+    def __init__(self, direccion=8765, timeout=None):
+        self.direccion = direccion
+        self.timeout = timeout
+        self._socket = None
+        self._archivo = None
+        self._siguiente_id = 0
+        self.latencia_ms = None
+        self.latencia_servidor_ms = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+    def _conectar(self):
+        if isinstance(self.direccion, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(self.direccion)
+        else:
+            direccion = ("127.0.0.1", self.direccion) if isinstance(self.direccion, int) else tuple(self.direccion)
+            self._socket = socket.create_connection(direccion, timeout=self.timeout)
+        self._archivo = self._socket.makefile("rwb")
+
+    def cerrar(self):
+        """Cierra la conexión con el servidor."""
+        if self._socket is not None:
+            self._archivo.close()
+            self._socket.close()
+            self._socket = self._archivo = None
+
+    def consultar(self, op, **argumentos):
+        """Envía una solicitud y devuelve la respuesta; si el servidor informa un error se lanza RuntimeError."""
+        if self._socket is None:
+            self._conectar()
+        self._siguiente_id += 1
+        inicio = time.perf_counter()
+        self._archivo.write(json.dumps({"op": op, "id": self._siguiente_id, **argumentos}).encode() + b"\n")
+        self._archivo.flush()
+        linea = self._archivo.readline()
+        self.latencia_ms = (time.perf_counter() - inicio) * 1e3
+        if not linea:
+            self.cerrar()
+            raise ConnectionError("El servidor cerró la conexión")
+        respuesta = json.loads(linea)
+        self.latencia_servidor_ms = respuesta.get("latencia_ms")
+        if not respuesta.get("ok"):
+            raise RuntimeError(respuesta.get("error"))
+        return respuesta
+
+    def zonas(self, puntos):
+        """Códigos de cobertura de suelo y zonas P.452 de puntos (lon, lat): devuelve (codigos, zonas)."""
+        respuesta = self.consultar("zonas", puntos=[list(p) for p in puntos])
+        return respuesta["codigos"], respuesta["zonas"]
+
+    def enlaces(self, enlaces, paso_m=100., claves=("L_b", "L_b_corr")):
+        """Pérdidas de enlaces (lon_t, lat_t, lon_r, lat_r[, zone_t, zone_r]): devuelve (resultados, errores).
+
+        Cada resultado es un dict con las `claves` de losses_complete (None
+        para todas), o None si el enlace falló; `errores` usa el índice del enlace.
+        """
+        respuesta = self.consultar("enlaces", enlaces=[list(e) for e in enlaces], paso_m=paso_m,
+                                   claves=None if claves is None else list(claves))
+        return respuesta["resultados"], {int(i): error for i, error in respuesta["errores"].items()}
+
+    def perdidas_vs_distancia(self, lon_t, lat_t, azimut, distancias_km, pasos_km=None, claves=("L_b",)):
+        """Pérdidas a varias distancias (km) sobre un azimut: devuelve (resultados, errores)."""
+        respuesta = self.consultar(
+            "perdidas_vs_distancia", lon_t=lon_t, lat_t=lat_t, azimut=azimut, distancias_km=list(distancias_km),
+            pasos_km=None if pasos_km is None else list(pasos_km), claves=None if claves is None else list(claves),
+        )
+        return respuesta["resultados"], {int(i): error for i, error in respuesta["errores"].items()}
+
+    def estado(self):
+        """Contadores y latencias del servidor."""
+        return self.consultar("estado")
@@ -0,0 +1,213 @@
+import numpy as np
+import rasterio
+from astropy import units as u
+from pycraf import pathprof
+from pyproj import CRS, Geod, Transformer
+from rasterio.transform import Affine
+from rasterio.windows import Window, transform as transform_ventana
+import Instrumentacion
+from Coordenadas import Coordenadas
+
+class CoberturaRadial:
+    """Pérdidas P.452 alrededor de un transmisor: todos los azimuts y distancias en un solo cálculo.
+
+    Se extrae un único perfil de alturas por azimut hasta la distancia
+    máxima y todas las distancias de ese azimut usan un tramo inicial de él.
+    Con los perfiles se arma el mismo diccionario que `height_map_data`, pero
+    en geometría polar (filas = azimuts, columnas = distancias), y se evalúa
+    con `atten_map_fast`. La zona de clutter del receptor sale del archivo de
+    cobertura de suelo en cada punto (UNKNOWN fuera del archivo), así
+    `L_b_corr` incluye la corrección por clutter de cada receptor.
+    """
+
+    def __init__(self, frequency=0.85 * u.GHz, temperature=310. * u.K, pressure=980 * u.hPa,
+                 h_tg=20 * u.m, h_rg=30 * u.m, time_percent=0.1 * u.percent, almacen_srtm=None):
+        self.frequency = frequency
+        self.temperature = temperature
+        self.pressure = pressure
+        self.h_tg = h_tg
+        self.h_rg = h_rg
+        self.time_percent = time_percent
+        self.almacen_srtm = almacen_srtm
+        self.geod = Geod(ellps='WGS84')
+
+    def _alturas(self, lons, lats):
+        if self.almacen_srtm is not None:
+            return self.almacen_srtm.alturas(lons, lats)
+        return pathprof.srtm_height_data(lons * u.deg, lats * u.deg).to_value(u.m)
+
+    def _hgt_res(self, lon_t, lat_t):
+        if self.almacen_srtm is not None:
+            return self.almacen_srtm.hgt_res
+        # Se consulta una altura para que SrtmConf conozca la resolución de las teselas
+        pathprof.srtm_height_data(lon_t * u.deg, lat_t * u.deg)
+        return pathprof.SrtmConf.hgt_res
+
+    @Instrumentacion.medido("CoberturaRadial.perfiles")
+    def perfiles(self, lon_t, lat_t, azimuts, distancia_maxima, paso):
+        """Alturas (n_azimuts, n_muestras) cada `paso` metros sobre cada azimut, y sus distancias.
+
+        Si el paso es mayor que la resolución de los datos se muestrea a
+        paso / 3 y se promedia con el mismo filtro gaussiano que
+        `srtm_height_profile`.
+        """
+        distancias = np.arange(0., distancia_maxima + paso, paso)
+        hgt_res = self._hgt_res(lon_t, lat_t)
+        submuestras = 3 if paso > hgt_res / 1.5 else 1
+        finas = np.arange(0., distancias[-1] + paso / submuestras / 2, paso / submuestras)
+
+        forma = (len(azimuts), len(finas))
+        lons, lats, contra = self.geod.fwd(np.full(forma, lon_t), np.full(forma, lat_t),
+                                           np.broadcast_to(np.asarray(azimuts, float)[:, None], forma),
+                                           np.broadcast_to(finas, forma))
+        alturas = self._alturas(lons, lats)
+        if np.isnan(alturas).any():
+            raise ValueError("La cobertura pasa por zonas sin datos de altura")
+
+        if submuestras > 1:
+            # Promedio gaussiano (ancho paso / 2.35, hasta 5 anchos), normalizado en los bordes
+            ancho = paso / 2.35
+            desplazamientos = np.arange(-int(5 * ancho / (paso / submuestras)), int(5 * ancho / (paso / submuestras)) + 1)
+            nucleo = np.exp(-0.5 * (desplazamientos * paso / submuestras / ancho) ** 2)
+            suma = np.zeros_like(alturas)
+            pesos = np.zeros(alturas.shape[1])
+            for desplazamiento, peso in zip(desplazamientos, nucleo):
+                origen = slice(max(desplazamiento, 0), alturas.shape[1] + min(desplazamiento, 0))
+                destino = slice(max(-desplazamiento, 0), alturas.shape[1] + min(-desplazamiento, 0))
+                suma[:, destino] += peso * alturas[:, origen]
+                pesos[destino] += peso
+            alturas = (suma / pesos)[:, ::submuestras]
+            lons, lats, contra = lons[:, ::submuestras], lats[:, ::submuestras], contra[:, ::submuestras]
+        return distancias, alturas, lons, lats, contra
+
+    @Instrumentacion.medido("CoberturaRadial.calcular")
+    def calcular(self, lon_t, lat_t, distancias, n_azimuts=360, archivo_tif=None, paso=None, zone_t=None):
+        """Pérdidas en la rejilla polar (azimut, distancia) alrededor de (lon_t, lat_t) en grados.
+
+        `distancias` es un Quantity con las distancias de los anillos; cada
+        una se evalúa en la muestra del perfil más cercana (el paso del
+        perfil es `paso`, por defecto un tercio de la resolución SRTM). Los
+        azimuts son n_azimuts valores equiespaciados desde 0° (norte). Con
+        `archivo_tif` las zonas de clutter del transmisor (salvo `zone_t`) y
+        de cada receptor salen de ese archivo. Devuelve un dict con
+        `azimuts` (grados), `distancias` (m), `lons`, `lats` de los receptores
+        y las salidas de `atten_map_fast` en arreglos (n_azimuts, n_distancias);
+        los anillos demasiado cercanos al transmisor quedan en NaN.
+        """
+        azimuts = np.arange(n_azimuts) * 360. / n_azimuts
+        distancias_m = np.atleast_1d(distancias.to_value(u.m))
+        paso = self._hgt_res(lon_t, lat_t) / 3. if paso is None else u.Quantity(paso, u.m).value
+        dist_prof, alturas, lons, lats, contra = self.perfiles(lon_t, lat_t, azimuts, distancias_m.max(), paso)
+
+        indices = np.minimum(np.rint(distancias_m / paso).astype(np.int32), len(dist_prof) - 1)
+        forma = (n_azimuts, len(indices))
+        lons_r, lats_r = lons[:, indices], lats[:, indices]
+        dist_km = np.broadcast_to(dist_prof[indices] * 1e-3, forma).copy()
+
+        if archivo_tif is not None:
+            with Instrumentacion.etapa("Coordenadas.zonas_p452"):
+                coordenadas = Coordenadas(archivo_tif)
+                zonas_r = coordenadas.obtener_zonas_p452(lons_r.ravel(), lats_r.ravel())[0].reshape(forma)
+                if zone_t is None:
+                    zone_t = int(coordenadas.obtener_zonas_p452([lon_t], [lat_t])[0][0])
+        else:
+            zonas_r = np.full(forma, pathprof.CLUTTER.UNKNOWN)
+        if zone_t is None:
+            zone_t = pathprof.CLUTTER.UNKNOWN
+
+        # Datos radiometeorológicos en el punto medio de cada trayecto
+        medios = indices // 2
+        delta_N, beta0, N0 = pathprof.radiomet_data_for_pathcenter(
+            lons[:, medios] * u.deg, lats[:, medios] * u.deg, dist_km * u.km, dist_km * u.km
+        )
+
+        hprof_data = {
+            'lon_t': lon_t, 'lat_t': lat_t, 'hprof_step': paso,
+            # atten_map_fast solo usa el largo de las coordenadas: columnas = distancias, filas = azimuts
+            'xcoords': dist_prof[indices], 'ycoords': azimuts,
+            'path_idx_map': np.broadcast_to(np.arange(n_azimuts, dtype=np.int32)[:, None], forma).copy(),
+            'dist_end_idx_map': np.broadcast_to(indices, forma).copy(),
+            'dist_map': dist_km,
+            'delta_N_map': delta_N.value, 'beta0_map': beta0.value, 'N0_map': N0.value,
+            'zone_t_map': np.full(forma, int(zone_t), dtype=np.int32),
+            'zone_r_map': zonas_r.astype(np.int32),
+            'd_tm_map': dist_km, 'd_lm_map': dist_km,
+            'd_ct_map': np.full(forma, 50000.), 'd_cr_map': np.full(forma, 50000.),
+            'omega_map': np.zeros(forma),
+            'dist_prof': dist_prof * 1e-3,
+            'height_profs': np.ascontiguousarray(alturas, dtype=np.float64),
+            'zheight_prof': np.zeros(len(dist_prof)),
+        }
+        with Instrumentacion.etapa("CoberturaRadial.atten_map_fast"):
+            resultados = pathprof.atten_map_fast(
+                self.frequency, self.temperature, self.pressure, self.h_tg, self.h_rg, self.time_percent, hprof_data
+            )
+
+        salida = {'azimuts': azimuts, 'distancias': dist_prof[indices], 'lons': lons_r, 'lats': lats_r,
+                  'zonas_r': zonas_r, 'lon_t': lon_t, 'lat_t': lat_t}
+        for clave, valor in resultados.items():
+            valor = np.asarray(getattr(valor, 'value', valor), dtype=float)
+            valor[:, indices < 4] = np.nan  # atten_map_fast no evalúa trayectos de menos de 5 muestras
+            salida[clave] = valor
+        return salida
+
+    def a_rejilla(self, polar, archivo_tif, clave='L_b_corr', submuestreo=1):
+        """Lleva una clave de `calcular` a la rejilla del archivo de cobertura de suelo.
+
+        La rejilla es la del archivo (cada `submuestreo` píxeles) recortada al
+        círculo cubierto; cada píxel toma el azimut más cercano e interpola
+        en distancia. Fuera del alcance calculado el valor es NaN. Un archivo
+        sin CRS se toma en EPSG:4326, como en Coordenadas. Devuelve (datos
+        float32, transform).
+        """
+        # Receptores en el CRS del archivo
+        x_r, y_r = polar['lons'], polar['lats']
+        crs = CRS.from_epsg(4326) if archivo_tif.crs is None else CRS.from_user_input(archivo_tif.crs.to_wkt())
+        a_geograficas = None
+        if not crs.is_geographic:
+            a_geograficas = Transformer.from_crs(crs, 'EPSG:4326', always_xy=True)
+            x_r, y_r = Transformer.from_crs('EPSG:4326', crs, always_xy=True).transform(x_r, y_r)
+
+        # Ventana del archivo que contiene todos los receptores
+        filas, columnas = Coordenadas(archivo_tif).coordenadas_a_pixeles(x_r, y_r)
+        alto, ancho = archivo_tif.forma
+        fila0, fila1 = max(int(filas.min()), 0), min(int(filas.max()) + 1, alto)
+        columna0, columna1 = max(int(columnas.min()), 0), min(int(columnas.max()) + 1, ancho)
+        if fila0 >= fila1 or columna0 >= columna1:
+            raise ValueError("La cobertura no se superpone con el archivo de cobertura de suelo")
+        transform = transform_ventana(Window(columna0, fila0, columna1 - columna0, fila1 - fila0), archivo_tif.transform)
+        transform = transform * Affine.scale(submuestreo)
+
+        # Centros de los píxeles de salida
+        n_filas = -(-(fila1 - fila0) // submuestreo)
+        n_columnas = -(-(columna1 - columna0) // submuestreo)
+        c, f = np.meshgrid(np.arange(n_columnas) + 0.5, np.arange(n_filas) + 0.5)
+        xs, ys = transform * (c, f)
+        if a_geograficas is not None:
+            xs, ys = a_geograficas.transform(xs, ys)
+
+        azimuts, _, distancias = self.geod.inv(np.full(xs.shape, polar['lon_t']), np.full(xs.shape, polar['lat_t']), xs, ys)
+        n_azimuts = len(polar['azimuts'])
+        fila_polar = np.rint((azimuts % 360) / (360. / n_azimuts)).astype(int) % n_azimuts
+
+        valores = polar[clave]
+        anillos = polar['distancias']
+        posicion = np.interp(distancias, anillos, np.arange(len(anillos)))
+        i0 = np.minimum(posicion.astype(int), len(anillos) - 2) if len(anillos) > 1 else np.zeros(posicion.shape, int)
+        fraccion = posicion - i0
+        i1 = np.minimum(i0 + 1, len(anillos) - 1)
+        datos = (1 - fraccion) * valores[fila_polar, i0] + fraccion * valores[fila_polar, i1]
+        datos[(distancias < anillos[0]) | (distancias > anillos[-1])] = np.nan
+        return datos.astype(np.float32), transform
+
+    def guardar_geotiff(self, ruta_salida, datos, transform, crs, etiquetas=None):
+        """Escribe una rejilla de `a_rejilla` como GeoTIFF float32 (NaN = sin dato)."""
+        profile = dict(
+            driver="GTiff", height=datos.shape[0], width=datos.shape[1], count=1, dtype="float32",
+            crs=crs, transform=transform, nodata=np.nan, compress="deflate", predictor=3,
+        )
+        with rasterio.open(ruta_salida, "w", **profile) as dst:
+            if etiquetas:
+                dst.update_tags(**etiquetas)
+            dst.write(datos, 1)
+        return ruta_salida
@@ -1,15 +1,20 @@
-from ArchivoTIF import ArchivoTIF
-from Coordenadas import Coordenadas
-from Graficas import Graficas
+# Solo la interfaz se importa al inicio: rasterio, pyproj, astropy, pycraf y matplotlib se cargan
+# cuando se usa la opción que los necesita, así el menú aparece sin esperar por ellos
 from Interfaz import Interfaz
-from astropy import units as u
 
 class Controlador:
     def __init__(self):
         self.interfaz = Interfaz()
         self.archivo_tif = None
         self.coordenadas = None
-        self.graficas = Graficas()
+        self.graficas = None
+
+    def obtener_graficas(self):
+        """Crea las gráficas (y carga pycraf, astropy y matplotlib) la primera vez que se usan."""
+        if self.graficas is None:
+            from Graficas import Graficas
+            self.graficas = Graficas()
+        return self.graficas
 
     def ejecutar(self):
         """Ejecuta el programa."""
@@ -34,6 +39,10 @@ class Controlador:
             elif opcion == "8":
                 self.modificar_corine()
             elif opcion == "9":
+                if self.archivo_tif:
+                    self.archivo_tif.cerrar()
+                if self.graficas:
+                    self.graficas.cerrar()
                 self.interfaz.mostrar_mensaje("Saliendo del programa...")
                 break
             else:
@@ -41,7 +50,11 @@ class Controlador:
 
     def ingresar_archivo_tif(self):
         """Permite al usuario ingresar un archivo TIF."""
+        from ArchivoTIF import ArchivoTIF
+        from Coordenadas import Coordenadas
         ruta = input("Ingrese la ruta del archivo TIF: ")
+        if self.archivo_tif:
+            self.archivo_tif.cerrar()
         self.archivo_tif = ArchivoTIF(ruta)
         self.archivo_tif.cargar_archivo()
         self.coordenadas = Coordenadas(self.archivo_tif)
@@ -107,21 +120,26 @@ class Controlador:
     def graficar_perdidas_vs_distancia(self):
         """Grafica las pérdidas vs. la distancia."""
         if self.archivo_tif:
+            from astropy import units as u
             # Definir coordenadas del transmisor y receptor
             lon_t = float(input("Ingrese la longitud del transmisor: ")) * u.deg
             lat_t = float(input("Ingrese la latitud del transmisor: ")) * u.deg
             lon_r = float(input("Ingrese la longitud del receptor: ")) * u.deg
             lat_r = float(input("Ingrese la latitud del receptor: ")) * u.deg
+            ruta_salida = input("Archivo .png/.svg donde guardar la gráfica (Enter para mostrarla): ").strip()
 
-            self.graficas.graficar_perdidas_vs_distancia(self.archivo_tif, lon_t, lat_t, lon_r, lat_r)
+            self.obtener_graficas().graficar_perdidas_vs_distancia(self.archivo_tif, lon_t, lat_t, lon_r, lat_r,
+                                                                   ruta_salida or None)
         else:
             self.interfaz.mostrar_mensaje("Error: No se ha cargado ningún archivo.")
 
     def convertir_esa_a_corine(self):
         """Convierte un archivo ESA WorldCover a Corine Land Cover."""
         if self.archivo_tif:
+            from ArchivoTIF import ArchivoTIF
             ruta_salida = self.interfaz.ingresar_ruta("Ingrese la ruta de salida para el archivo Corine: ")
             ruta_corine = self.archivo_tif.convertir_esa_a_corine(ruta_salida)
+            self.archivo_tif.cerrar()
             self.archivo_tif = ArchivoTIF(ruta_corine)
             self.archivo_tif.cargar_archivo()
             self.interfaz.mostrar_mensaje(f"Archivo Corine guardado en: {ruta_corine}")
@@ -131,8 +149,10 @@ class Controlador:
     def modificar_corine(self):
         """Modifica el archivo Corine Land Cover para incluir categorías adicionales."""
         if self.archivo_tif:
+            from ArchivoTIF import ArchivoTIF
             ruta_salida = self.interfaz.ingresar_ruta("Ingrese la ruta de salida para el archivo Corine modificado: ")
             ruta_modificada = self.archivo_tif.modificar_corine(ruta_salida)
+            self.archivo_tif.cerrar()
             self.archivo_tif = ArchivoTIF(ruta_modificada)
             self.archivo_tif.cargar_archivo()
             self.interfaz.mostrar_mensaje(f"Archivo Corine modificado guardado en: {ruta_modificada}")
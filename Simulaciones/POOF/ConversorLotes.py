@@ -0,0 +1,169 @@
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+import rasterio
+from Reclasificador import Reclasificador
+
+# Nombres de tipos de GDAL para el VRT
+TIPOS_GDAL = {
+    "uint8": "Byte", "int8": "Int8", "uint16": "UInt16", "int16": "Int16",
+    "uint32": "UInt32", "int32": "Int32", "float32": "Float32", "float64": "Float64",
+}
+
+def _firma_fuente(ruta):
+    """Tamaño y fecha de modificación del archivo fuente, guardados en la salida."""
+    estado = os.stat(ruta)
+    return {"FUENTE_TAMANO": str(estado.st_size), "FUENTE_MTIME_NS": str(estado.st_mtime_ns)}
+
+def _convertir_tesela(ruta_entrada, ruta_salida, tabla, valor_defecto):
+    # Se escribe en un archivo temporal y se renombra al final: una conversión
+    # interrumpida nunca deja una salida que parezca actualizada
+    ruta_temporal = ruta_salida + ".tmp"
+    Reclasificador(tabla, valor_defecto).reclasificar_archivo(
+        ruta_entrada, ruta_temporal, etiquetas=_firma_fuente(ruta_entrada)
+    )
+    os.replace(ruta_temporal, ruta_salida)
+    return ruta_salida
+
+class ConversorLotes:
+    """Convierte muchas teselas ESA WorldCover a Corine en paralelo y arma un mosaico VRT."""
+
+    def __init__(self, tabla=None, valor_defecto=0, max_workers=None, sufijo="_Corine"):
+        self.tabla = tabla if tabla is not None else Reclasificador.ESA_A_CORINE
+        self.valor_defecto = valor_defecto
+        self.max_workers = max_workers
+        self.sufijo = sufijo
+
+    def listar_teselas(self, entrada):
+        """Acepta un directorio (todos sus .tif) o un patrón glob."""
+        if os.path.isdir(entrada):
+            entrada = os.path.join(entrada, "*.tif")
+        return sorted(glob.glob(entrada))
+
+    def ruta_salida(self, ruta_tesela, directorio_salida):
+        nombre = os.path.splitext(os.path.basename(ruta_tesela))[0]
+        return os.path.join(directorio_salida, f"{nombre}{self.sufijo}.tif")
+
+    def esta_actualizada(self, ruta_entrada, ruta_salida):
+        """La salida existe y se generó a partir de la versión actual de la fuente."""
+        if not os.path.exists(ruta_salida):
+            return False
+        try:
+            with rasterio.open(ruta_salida) as src:
+                etiquetas = src.tags()
+        except rasterio.errors.RasterioIOError:
+            return False
+        firma = _firma_fuente(ruta_entrada)
+        return all(etiquetas.get(clave) == valor for clave, valor in firma.items())
+
+    def convertir(self, entrada, directorio_salida, nombre_vrt="mosaico.vrt", forzar=False):
+        """Convierte las teselas pendientes en paralelo y construye el VRT con todas las salidas.
+
+        Devuelve un dict con las rutas convertidas, omitidas (ya actualizadas),
+        los errores por tesela y la ruta del VRT.
+        """
+        os.makedirs(directorio_salida, exist_ok=True)
+        teselas = self.listar_teselas(entrada)
+        resumen = {"convertidas": [], "omitidas": [], "errores": {}, "vrt": None}
+
+        pendientes = []
+        for ruta in teselas:
+            salida = self.ruta_salida(ruta, directorio_salida)
+            if not forzar and self.esta_actualizada(ruta, salida):
+                resumen["omitidas"].append(salida)
+            else:
+                pendientes.append((ruta, salida))
+
+        if pendientes:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futuros = [
+                    (ruta, executor.submit(_convertir_tesela, ruta, salida, self.tabla, self.valor_defecto))
+                    for ruta, salida in pendientes
+                ]
+                for ruta, futuro in futuros:
+                    try:
+                        resumen["convertidas"].append(futuro.result())
+                    except Exception as e:
+                        resumen["errores"][ruta] = str(e)
+
+        salidas = sorted(resumen["convertidas"] + resumen["omitidas"])
+        if salidas:
+            resumen["vrt"] = self.construir_vrt(salidas, os.path.join(directorio_salida, nombre_vrt))
+        return resumen
+
+    def construir_vrt(self, rutas, ruta_vrt):
+        """Escribe un mosaico virtual (VRT de GDAL) que referencia las teselas sin copiarlas.
+
+        Todas las teselas deben compartir CRS, resolución y tipo de dato.
+        """
+        teselas = []
+        for ruta in rutas:
+            with rasterio.open(ruta) as src:
+                teselas.append({
+                    "ruta": ruta, "ancho": src.width, "alto": src.height, "bounds": src.bounds,
+                    "res": src.res, "crs": src.crs, "dtype": src.dtypes[0], "nodata": src.nodata,
+                    "bloque": src.block_shapes[0],
+                })
+
+        referencia = teselas[0]
+        for tesela in teselas[1:]:
+            if tesela["crs"] != referencia["crs"] or tesela["dtype"] != referencia["dtype"] \
+                    or any(abs(a - b) > 1e-12 for a, b in zip(tesela["res"], referencia["res"])):
+                raise ValueError(f"La tesela {tesela['ruta']} no es compatible con {referencia['ruta']}")
+
+        res_x, res_y = referencia["res"]
+        oeste = min(t["bounds"].left for t in teselas)
+        norte = max(t["bounds"].top for t in teselas)
+        este = max(t["bounds"].right for t in teselas)
+        sur = min(t["bounds"].bottom for t in teselas)
+        ancho = int(round((este - oeste) / res_x))
+        alto = int(round((norte - sur) / res_y))
+        tipo = TIPOS_GDAL[referencia["dtype"]]
+        directorio_vrt = os.path.dirname(os.path.abspath(ruta_vrt))
+
+        lineas = [
+            f'<VRTDataset rasterXSize="{ancho}" rasterYSize="{alto}">',
+            f"  <SRS>{escape(referencia['crs'].to_wkt())}</SRS>",
+            f"  <GeoTransform>{oeste!r}, {res_x!r}, 0.0, {norte!r}, 0.0, {-res_y!r}</GeoTransform>",
+            f'  <VRTRasterBand dataType="{tipo}" band="1">',
+        ]
+        if referencia["nodata"] is not None:
+            lineas.append(f"    <NoDataValue>{referencia['nodata']!r}</NoDataValue>")
+        for t in teselas:
+            x = int(round((t["bounds"].left - oeste) / res_x))
+            y = int(round((norte - t["bounds"].top) / res_y))
+            ruta_relativa = os.path.relpath(os.path.abspath(t["ruta"]), directorio_vrt)
+            alto_bloque, ancho_bloque = t["bloque"]
+            lineas += [
+                "    <SimpleSource>",
+                f'      <SourceFilename relativeToVRT="1">{escape(ruta_relativa)}</SourceFilename>',
+                "      <SourceBand>1</SourceBand>",
+                f'      <SourceProperties RasterXSize="{t["ancho"]}" RasterYSize="{t["alto"]}" '
+                f'DataType="{tipo}" BlockXSize="{ancho_bloque}" BlockYSize="{alto_bloque}"/>',
+                f'      <SrcRect xOff="0" yOff="0" xSize="{t["ancho"]}" ySize="{t["alto"]}"/>',
+                f'      <DstRect xOff="{x}" yOff="{y}" xSize="{t["ancho"]}" ySize="{t["alto"]}"/>',
+                "    </SimpleSource>",
+            ]
+        lineas += ["  </VRTRasterBand>", "</VRTDataset>"]
+
+        with open(ruta_vrt, "w") as f:
+            f.write("\n".join(lineas) + "\n")
+        return ruta_vrt
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversión en paralelo de teselas ESA WorldCover a Corine")
+    parser.add_argument("entrada", help="Directorio con teselas .tif o patrón glob (entre comillas)")
+    parser.add_argument("salida", help="Directorio de salida")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--vrt", default="mosaico.vrt", help="Nombre del mosaico virtual")
+    parser.add_argument("--forzar", action="store_true", help="Reconvertir aunque la salida esté actualizada")
+    args = parser.parse_args()
+
+    resumen = ConversorLotes(max_workers=args.workers).convertir(args.entrada, args.salida, args.vrt, args.forzar)
+    print(f"Convertidas: {len(resumen['convertidas'])}, omitidas (sin cambios): {len(resumen['omitidas'])}")
+    for ruta, error in resumen["errores"].items():
+        print(f"Error en {ruta}: {error}")
+    if resumen["vrt"]:
+        print(f"Mosaico virtual: {resumen['vrt']}")
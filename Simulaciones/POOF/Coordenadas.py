@@ -29,16 +29,75 @@ class Coordenadas:
 
     def obtener_zona_clutter(self, lon, lat):
         """Obtiene la zona de clutter para unas coordenadas específicas."""
-        if self.archivo_tif.datos is None or self.archivo_tif.transform is None:
+        if not self.archivo_tif.esta_cargado():
             print("Error: No se ha cargado ningún archivo.")
             return None
 
         # Convertir coordenadas geográficas a píxeles
         x, y = ~self.archivo_tif.transform * (lon, lat)
-        x, y = int(x), int(y)
+        x, y = int(np.floor(x)), int(np.floor(y))
 
-        # Verificar si las coordenadas están dentro de los límites de la imagen
-        if 0 <= y < self.archivo_tif.datos.shape[0] and 0 <= x < self.archivo_tif.datos.shape[1]:
-            return self.archivo_tif.datos[y, x]  # Obtener el valor de la zona de clutter
-        else:
-            return None  # Fuera de los límites de la imagen
\ No newline at end of file
+        # Obtener el valor de la zona de clutter (None fuera de los límites de la imagen);
+        # en modo perezoso solo se lee el píxel pedido
+        return self.archivo_tif.leer_pixel(y, x)
+
+    def coordenadas_a_pixeles(self, lons, lats):
+        """Convierte arreglos de (lon, lat) a índices (fila, columna) con una sola operación afín."""
+        inversa = ~self.archivo_tif.transform
+        lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+        columnas = np.floor(inversa.a * lons + inversa.b * lats + inversa.c).astype(np.intp)
+        filas = np.floor(inversa.d * lons + inversa.e * lats + inversa.f).astype(np.intp)
+        return filas, columnas
+
+    @staticmethod
+    def _sin_archivo(lons, lats, valor_fuera):
+        # Sin archivo cargado ningún punto cae en la imagen: mismo (zonas, dentro) que fuera de los límites
+        print("Error: No se ha cargado ningún archivo.")
+        forma = np.broadcast(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)).shape
+        return np.full(forma, valor_fuera), np.zeros(forma, dtype=bool)
+
+    def obtener_zonas_clutter(self, lons, lats, valor_fuera=0):
+        """Zonas de clutter de muchos puntos a la vez.
+
+        Devuelve (zonas, dentro): `dentro` marca los puntos que caen en la
+        imagen; el resto recibe `valor_fuera` (todos, si no hay archivo
+        cargado). En modo perezoso solo se leen los bloques del archivo que
+        contienen algún punto.
+        """
+        if not self.archivo_tif.esta_cargado():
+            return self._sin_archivo(lons, lats, valor_fuera)
+
+        filas, columnas = self.coordenadas_a_pixeles(lons, lats)
+        alto, ancho = self.archivo_tif.forma
+        dentro = (filas >= 0) & (filas < alto) & (columnas >= 0) & (columnas < ancho)
+
+        valores = self.archivo_tif.leer_pixeles(filas[dentro], columnas[dentro])
+        zonas = np.full(filas.shape, valor_fuera, dtype=valores.dtype)
+        zonas[dentro] = valores
+        return zonas, dentro
+
+    def obtener_zonas_p452(self, lons, lats):
+        """Zonas de clutter P.452 de muchos puntos a la vez: devuelve (zonas, dentro).
+
+        Con la banda en memoria se usa la conversión guardada en el ArchivoTIF;
+        en modo perezoso solo se convierten los píxeles de los puntos pedidos.
+        Los puntos fuera de la imagen (todos, si no hay archivo cargado) quedan
+        en -1 (UNKNOWN).
+        """
+        if not self.archivo_tif.esta_cargado():
+            return self._sin_archivo(lons, lats, -1)
+
+        if self.archivo_tif.datos is None:
+            from pycraf import pathprof
+            codigos, dentro = self.obtener_zonas_clutter(lons, lats)
+            zonas = pathprof.landcover_to_p452_clutter_zones(codigos, pathprof.CORINE_TO_P452_CLASSES)
+            zonas[~dentro] = -1
+            return zonas, dentro
+
+        zonas_p452 = self.archivo_tif.obtener_zonas_p452()
+        filas, columnas = self.coordenadas_a_pixeles(lons, lats)
+        alto, ancho = self.archivo_tif.forma
+        dentro = (filas >= 0) & (filas < alto) & (columnas >= 0) & (columnas < ancho)
+        zonas = np.full(filas.shape, -1, dtype=zonas_p452.dtype)
+        zonas[dentro] = zonas_p452[filas[dentro], columnas[dentro]]
+        return zonas, dentro
\ No newline at end of file
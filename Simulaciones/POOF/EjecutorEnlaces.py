@@ -0,0 +1,197 @@
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+from astropy import units as u
+from pycraf import pathprof
+import Instrumentacion
+from ArchivoTIF import ArchivoTIF
+from Coordenadas import Coordenadas
+from MotorP452 import MotorP452
+
+# Opciones de SrtmConf que se copian del proceso principal a cada trabajador
+OPCIONES_SRTM = ('srtm_dir', 'download', 'server', 'interp')
+
+# Estado propio de cada proceso trabajador (se crea una sola vez en el inicializador)
+_motor = None
+_coordenadas = None
+
+def _inicializar_trabajador(configuracion_srtm, ruta_clutter, parametros):
+    global _motor, _coordenadas
+    # Con fork el trabajador hereda los manejadores del proceso principal (p. ej. el SIGTERM de
+    # ServidorConsultas); el pool ya termina sus trabajadores al cerrarse
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    pathprof.SrtmConf.set(**configuracion_srtm)
+    _motor = MotorP452(**parametros)
+    _coordenadas = None
+    if ruta_clutter is not None:
+        archivo_tif = ArchivoTIF(ruta_clutter)
+        archivo_tif.cargar_archivo()
+        if archivo_tif.datos is not None:
+            archivo_tif.obtener_zonas_p452()  # conversión a P.452 una sola vez por proceso
+        _coordenadas = Coordenadas(archivo_tif)
+
+def _zonas(lons, lats):
+    """Zonas P.452 de los puntos; None fuera del archivo de clutter, UNKNOWN si no hay archivo."""
+    if _coordenadas is None:
+        return [int(pathprof.CLUTTER.UNKNOWN)] * len(lons)
+    zonas, dentro = _coordenadas.obtener_zonas_p452(lons, lats)
+    return [int(zona) if esta_dentro else None for zona, esta_dentro in zip(zonas, dentro)]
+
+def _valores(resultados):
+    """Resultados de losses_complete como números simples (se transfieren más rápido entre procesos)."""
+    return {clave: getattr(valor, 'value', valor) for clave, valor in resultados.items()}
+
+def _error(e):
+    return f"{type(e).__name__}: {e}"
+
+def _evaluar_enlaces(indices, enlaces, hprof_step):
+    # Zonas de transmisores y receptores del lote en una sola consulta
+    zonas = _zonas([enlace[j] for enlace in enlaces for j in (0, 2)], [enlace[j] for enlace in enlaces for j in (1, 3)])
+
+    salida = []
+    for k, (indice, (lon_t, lat_t, lon_r, lat_r, zone_t, zone_r)) in enumerate(zip(indices, enlaces)):
+        zone_t = zonas[2 * k] if zone_t is None else zone_t
+        zone_r = zonas[2 * k + 1] if zone_r is None else zone_r
+        try:
+            if zone_t is None or zone_r is None:
+                raise ValueError("El transmisor o el receptor está fuera del archivo de clutter")
+            if _motor.cache_perfiles is not None or _motor.almacen_srtm is not None:
+                # Con caché de perfiles o teselas locales el enlace pasa por el motor, que lee el perfil del disco
+                azimut, _, distancia = _motor.geod.inv(lon_t, lat_t, lon_r, lat_r)
+                ruta = _motor.preparar_ruta(lon_t * u.deg, lat_t * u.deg, azimut,
+                                            u.Quantity([distancia * u.m]), u.Quantity([hprof_step]))
+                resultados = _motor.perdidas(ruta, 0, zone_t, zone_r)
+            else:
+                with Instrumentacion.etapa("pathprof.losses_complete"):
+                    resultados = pathprof.losses_complete(
+                        _motor.frequency,
+                        _motor.temperature,
+                        _motor.pressure,
+                        lon_t * u.deg, lat_t * u.deg,
+                        lon_r * u.deg, lat_r * u.deg,
+                        _motor.h_tg, _motor.h_rg,
+                        hprof_step,
+                        _motor.time_percent,
+                        zone_t=zone_t,
+                        zone_r=zone_r,
+                    )
+            salida.append((indice, _valores(resultados), None))
+        except Exception as e:
+            salida.append((indice, None, _error(e)))
+    return salida
+
+def _evaluar_distancias(indices, lon_t, lat_t, azimut, distancias, pasos):
+    try:
+        ruta = _motor.preparar_ruta(lon_t * u.deg, lat_t * u.deg, azimut, distancias, pasos)
+    except Exception as e:
+        return [(indice, None, _error(e)) for indice in indices]
+
+    zonas = _zonas(np.r_[lon_t, ruta['lons_r']], np.r_[lat_t, ruta['lats_r']])
+    salida = []
+    for i, indice in enumerate(indices):
+        try:
+            if zonas[0] is None or zonas[i + 1] is None:
+                raise ValueError("El transmisor o el receptor está fuera del archivo de clutter")
+            salida.append((indice, _valores(_motor.perdidas(ruta, i, zonas[0], zonas[i + 1])), None))
+        except Exception as e:
+            salida.append((indice, None, _error(e)))
+    return salida
+
+class EjecutorEnlaces:
+    """Evalúa enlaces P.452 independientes en un ProcessPoolExecutor.
+
+    Cada trabajador configura SrtmConf (copiada del proceso principal al
+    crear el ejecutor), carga el archivo de clutter y convierte sus zonas a
+    P.452 una sola vez. Los enlaces se envían en lotes de `tam_lote`. Los
+    resultados vuelven en el orden de entrada: un dict de valores por enlace,
+    o None si falló, con el mensaje de error en `errores[indice]`. El pool se
+    reutiliza entre llamadas hasta `cerrar()` (o al salir del `with`).
+    `parametros` son los de `MotorP452` (frecuencia, alturas, etc.); con
+    `cache_perfiles` o `almacen_srtm` también los enlaces sueltos toman el
+    perfil de la caché o de las teselas locales.
+    """
+
+    def __init__(self, max_workers=None, ruta_clutter=None, tam_lote=4, mp_context=None, **parametros):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.ruta_clutter = ruta_clutter
+        self.tam_lote = tam_lote
+        self.mp_context = mp_context
+        self.parametros = parametros
+        self.configuracion_srtm = {opcion: getattr(pathprof.SrtmConf, opcion) for opcion in OPCIONES_SRTM}
+        self._executor = None
+        self._candado = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cerrar()
+
+    def _pool(self):
+        # Varios hilos pueden compartir el ejecutor (ver ServidorConsultas): el pool se crea una sola vez
+        with self._candado:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=self.mp_context, initializer=_inicializar_trabajador,
+                    initargs=(self.configuracion_srtm, self.ruta_clutter, self.parametros),
+                )
+            return self._executor
+
+    def iniciar(self):
+        """Arranca los trabajadores sin esperar al primer cálculo."""
+        # El pool crea sus procesos al recibir tareas: una tarea vacía por trabajador los arranca ya
+        pool = self._pool()
+        wait([pool.submit(os.getpid) for _ in range(self.max_workers)])
+
+    def cerrar(self):
+        """Termina los procesos trabajadores."""
+        with self._candado:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _reunir(self, n, futuros):
+        resultados, errores = [None] * n, {}
+        for futuro in futuros:
+            for indice, resultado, error in futuro.result():
+                resultados[indice] = resultado
+                if error is not None:
+                    errores[indice] = error
+        return resultados, errores
+
+    @Instrumentacion.medido("EjecutorEnlaces.ejecutar")
+    def ejecutar(self, enlaces, hprof_step=100 * u.m):
+        """Evalúa enlaces (lon_t, lat_t, lon_r, lat_r[, zone_t, zone_r]) en grados.
+
+        Las zonas que falten (o sean None) se obtienen del archivo de clutter.
+        Devuelve (resultados, errores).
+        """
+        enlaces = [tuple(enlace) + (None,) * (6 - len(enlace)) for enlace in enlaces]
+        pool = self._pool()
+        futuros = [
+            pool.submit(_evaluar_enlaces, list(range(inicio, min(inicio + self.tam_lote, len(enlaces)))),
+                        enlaces[inicio:inicio + self.tam_lote], hprof_step)
+            for inicio in range(0, len(enlaces), self.tam_lote)
+        ]
+        return self._reunir(len(enlaces), futuros)
+
+    @Instrumentacion.medido("EjecutorEnlaces.perdidas_vs_distancia")
+    def perdidas_vs_distancia(self, lon_t, lat_t, azimut, distancias, pasos):
+        """Pérdidas a varias distancias sobre un azimut, repartidas entre los trabajadores.
+
+        `distancias` y `pasos` son Quantity. Las distancias se reparten
+        intercaladas en un lote por trabajador (así cada lote mezcla distancias
+        cortas y largas) y cada lote extrae un solo perfil de alturas (ver
+        `MotorP452`). Devuelve (resultados, errores).
+        """
+        lon_t, lat_t = u.Quantity(lon_t, u.deg).value, u.Quantity(lat_t, u.deg).value
+        n = len(distancias)
+        pool = self._pool()
+        futuros = [
+            pool.submit(_evaluar_distancias, list(range(inicio, n, self.max_workers)), lon_t, lat_t,
+                        azimut, distancias[inicio::self.max_workers], pasos[inicio::self.max_workers])
+            for inicio in range(min(self.max_workers, n))
+        ]
+        return self._reunir(n, futuros)
@@ -1,25 +1,35 @@
-from pycraf import pathprof
 import numpy as np
-import matplotlib.pyplot as plt
 from astropy import units as u
 from pyproj import Geod
+import Instrumentacion
+from Coordenadas import Coordenadas
+from MotorP452 import MotorP452
 
 
 class Graficas:
-    def graficar_perdidas_vs_distancia(self, archivo_tif, lon_t, lat_t, lon_r, lat_r):
-        """Grafica las pérdidas de señal en función de la distancia."""
-        if archivo_tif.datos is None:
+    def __init__(self, max_workers=None, cache_perfiles=None, almacen_srtm=None):
+        """`max_workers` > 1 reparte las distancias entre procesos (ver EjecutorEnlaces);
+        `cache_perfiles` (CachePerfiles) reutiliza los perfiles de alturas entre ejecuciones;
+        `almacen_srtm` (AlmacenSRTM) extrae los perfiles de teselas locales, sin red."""
+        self.geod = Geod(ellps='WGS84')
+        self.max_workers = max_workers
+        self.cache_perfiles = cache_perfiles
+        self.almacen_srtm = almacen_srtm
+        self._ejecutor = None
+
+    @Instrumentacion.medido("Graficas.perdidas_vs_distancia")
+    def graficar_perdidas_vs_distancia(self, archivo_tif, lon_t, lat_t, lon_r, lat_r, ruta_salida=None):
+        """Grafica las pérdidas de señal en función de la distancia.
+
+        Con `ruta_salida` (.png o .svg) la gráfica se guarda sin pantalla en
+        lugar de mostrarse (ver GraficasLote).
+        """
+        if not archivo_tif.esta_cargado():
             print("Error: No se ha cargado ningún archivo.")
             return
 
-        # Convertir las zonas de Corine a tipos de clutter P.452
-        p452_clutter_zones = pathprof.landcover_to_p452_clutter_zones(
-            archivo_tif.datos, pathprof.CORINE_TO_P452_CLASSES
-        )
-
         # Definir coordenadas del transmisor y receptor
-        geod = Geod(ellps='WGS84')
-        azimut, _, distancia_maxima = geod.inv(lon_t.value, lat_t.value, lon_r.value, lat_r.value)
+        azimut, _, distancia_maxima = self.geod.inv(lon_t.value, lat_t.value, lon_r.value, lat_r.value)
         distancia_maxima = distancia_maxima * u.m
 
         # Parámetros para el cálculo de propagación
@@ -34,58 +44,138 @@ class Graficas:
         distancias = np.linspace(0.1, 3, 10) * u.km  # Distancias entre 0.1 y 3 km
         perdidas = []  # Para almacenar las pérdidas de propagación
 
-        for distancia in distancias:
-            # Ajustar hprof_step si la distancia es muy pequeña
-            if distancia < 5 * hprof_step:
-                hprof_step_temp = distancia / 5
-            else:
-                hprof_step_temp = hprof_step
-
-            # Calcular coordenadas intermedias
-            lon_r_temp, lat_r_temp, _ = geod.fwd(lon_t.value, lat_t.value, azimut, distancia.to(u.m).value)
-            lon_r_temp *= u.deg
-            lat_r_temp *= u.deg
-
-            # Obtener la zona de clutter en la ubicación temporal del receptor
-            zone_r_temp = self.obtener_zona_clutter(lon_r_temp.value, lat_r_temp.value, p452_clutter_zones, archivo_tif.transform)
+        # Ajustar hprof_step si la distancia es muy pequeña (todas las distancias a la vez)
+        pasos = np.where(distancias < 5 * hprof_step, distancias / 5, hprof_step.to(u.km))
 
+        parametros = dict(frequency=frequency, temperature=temperature, pressure=pressure,
+                          h_tg=h_tg, h_rg=h_rg, time_percent=time_percent, cache_perfiles=self.cache_perfiles,
+                          almacen_srtm=self.almacen_srtm)
+        if self.max_workers and self.max_workers > 1:
             try:
-                # Calcular las pérdidas de propagación
-                results = pathprof.losses_complete(
-                    frequency,
-                    temperature,
-                    pressure,
-                    lon_t, lat_t,
-                    lon_r_temp, lat_r_temp,
-                    h_tg, h_rg,
-                    hprof_step_temp,
-                    time_percent,
-                    zone_t=self.obtener_zona_clutter(lon_t.value, lat_t.value, p452_clutter_zones, archivo_tif.transform),
-                    zone_r=zone_r_temp,
+                resultados, errores = self._obtener_ejecutor(archivo_tif, parametros).perdidas_vs_distancia(
+                    lon_t, lat_t, azimut, distancias, pasos
                 )
-                perdidas.append(results['L_b'].value)  # Extraer las pérdidas básicas (L_b)
             except Exception as e:
-                print(f"Error en la iteración de distancia {distancia}: {e}")
-                continue
+                # Fallo del inicializador de los trabajadores o pool roto (BrokenProcessPool): el
+                # ejecutor ya no sirve y se descarta para que la próxima llamada cree otro
+                print(f"Error en el cálculo en paralelo: {e}")
+                self.cerrar()
+                return
+            for i, distancia in enumerate(distancias):
+                if i in errores:
+                    print(f"Error en la iteración de distancia {distancia}: {errores[i]}")
+                else:
+                    perdidas.append(resultados[i]['L_b'])
+        else:
+            # Perfil de alturas extraído una sola vez hasta la distancia máxima; cada distancia
+            # usa un subperfil de esa extracción
+            motor = MotorP452(**parametros)
+            try:
+                ruta = motor.preparar_ruta(lon_t, lat_t, azimut, distancias, pasos)
+            except Exception as e:
+                print(f"Error al extraer el perfil de alturas: {e}")
+                return
+
+            # Zonas de clutter P.452 del transmisor y de todos los receptores en un solo lote
+            # (la conversión de Corine a P.452 queda guardada en el ArchivoTIF)
+            with Instrumentacion.etapa("Coordenadas.zonas_p452"):
+                zonas, dentro = Coordenadas(archivo_tif).obtener_zonas_p452(
+                    np.r_[lon_t.value, ruta['lons_r']], np.r_[lat_t.value, ruta['lats_r']]
+                )
+            zonas = [int(zona) if esta_dentro else None for zona, esta_dentro in zip(zonas, dentro)]
+            zone_t, zonas_r = zonas[0], zonas[1:]
+
+            for i, distancia in enumerate(distancias):
+                try:
+                    # Calcular las pérdidas de propagación
+                    results = motor.perdidas(ruta, i, zone_t, zonas_r[i])
+                    perdidas.append(results['L_b'].value)  # Extraer las pérdidas básicas (L_b)
+                except Exception as e:
+                    print(f"Error en la iteración de distancia {distancia}: {e}")
+                    continue
 
         # Graficar las pérdidas
         if len(perdidas) == len(distancias):
-            plt.figure(figsize=(10, 6))
-            plt.plot(distancias, perdidas, label='Pérdidas vs. Distancia', color='blue')
-            plt.title('Atenuación vs. Distancia')
-            plt.xlabel('Distancia (km)')
-            plt.ylabel('Atenuación (dB)')
-            plt.grid(True)
-            plt.legend()
+            if ruta_salida:
+                from GraficasLote import guardar_curva
+                guardar_curva(ruta_salida, distancias.to_value(u.km), perdidas)
+                print(f"Gráfica guardada en: {ruta_salida}")
+                return
+            import matplotlib.pyplot as plt
+            with Instrumentacion.etapa("Graficas.dibujo"):
+                plt.figure(figsize=(10, 6))
+                plt.plot(distancias, perdidas, label='Pérdidas vs. Distancia', color='blue')
+                plt.title('Atenuación vs. Distancia')
+                plt.xlabel('Distancia (km)')
+                plt.ylabel('Atenuación (dB)')
+                plt.grid(True)
+                plt.legend()
             plt.show()
         else:
             print(f"Error: las longitudes de distancias y pérdidas no coinciden. Distancias: {len(distancias)}, Pérdidas: {len(perdidas)}")
 
-    def obtener_zona_clutter(self, lon, lat, clutter_zones, transform):
-        """Obtiene la zona de clutter para unas coordenadas específicas."""
-        x, y = ~transform * (lon, lat)
-        x, y = int(x), int(y)
-        if 0 <= y < clutter_zones.shape[0] and 0 <= x < clutter_zones.shape[1]:
-            return clutter_zones[y, x]
+    @Instrumentacion.medido("Graficas.cobertura")
+    def graficar_cobertura(self, archivo_tif, lon_t, lat_t, radio=10 * u.km, n_azimuts=360, n_distancias=200,
+                           ruta_geotiff=None, ruta_salida=None):
+        """Grafica las pérdidas (con corrección por clutter) en todos los azimuts alrededor del transmisor.
+
+        Con `ruta_geotiff` la cobertura también se guarda como GeoTIFF alineado con el archivo cargado;
+        con `ruta_salida` la gráfica se guarda como imagen en lugar de mostrarse.
+        """
+        if not archivo_tif.esta_cargado():
+            print("Error: No se ha cargado ningún archivo.")
+            return None
+
+        from CoberturaRadial import CoberturaRadial
+        cobertura = CoberturaRadial(almacen_srtm=self.almacen_srtm)
+        try:
+            polar = cobertura.calcular(lon_t.to_value(u.deg), lat_t.to_value(u.deg),
+                                       np.linspace(0, radio.to_value(u.km), n_distancias + 1)[1:] * u.km,
+                                       n_azimuts, archivo_tif)
+        except Exception as e:
+            print(f"Error al calcular la cobertura: {e}")
+            return None
+
+        if ruta_geotiff:
+            datos, transform = cobertura.a_rejilla(polar, archivo_tif)
+            cobertura.guardar_geotiff(ruta_geotiff, datos, transform, archivo_tif.crs,
+                                      {'clave': 'L_b_corr', 'unidad': 'dB', 'lon_t': lon_t.value, 'lat_t': lat_t.value})
+            print(f"Cobertura guardada en: {ruta_geotiff}")
+
+        # Azimut en sentido horario desde el norte
+        if ruta_salida:
+            # Figure sin pyplot: no necesita pantalla y se libera al salir de la función
+            from matplotlib.figure import Figure
+            fig = Figure(figsize=(8, 8))
+            ax = fig.add_subplot(projection='polar')
+        else:
+            import matplotlib.pyplot as plt
+            fig, ax = plt.subplots(figsize=(8, 8), subplot_kw={'projection': 'polar'})
+        ax.set_theta_zero_location('N')
+        ax.set_theta_direction(-1)
+        malla = ax.pcolormesh(np.radians(polar['azimuts']), polar['distancias'] * 1e-3, polar['L_b_corr'].T,
+                              shading='nearest', cmap='viridis_r')
+        fig.colorbar(malla, ax=ax, label='Atenuación (dB)')
+        ax.set_title('Cobertura radial (km)')
+        if ruta_salida:
+            with Instrumentacion.etapa("Graficas.dibujo"):
+                fig.savefig(ruta_salida)
+            print(f"Gráfica guardada en: {ruta_salida}")
         else:
-            return None
\ No newline at end of file
+            plt.show()
+        return polar
+
+    def _obtener_ejecutor(self, archivo_tif, parametros):
+        """Pool de procesos reutilizado mientras no cambie el archivo de clutter."""
+        if self._ejecutor is not None and self._ejecutor.ruta_clutter != archivo_tif.ruta_archivo:
+            self.cerrar()
+        if self._ejecutor is None:
+            from EjecutorEnlaces import EjecutorEnlaces
+            self._ejecutor = EjecutorEnlaces(self.max_workers, archivo_tif.ruta_archivo, **parametros)
+        return self._ejecutor
+
+    def cerrar(self):
+        """Termina los procesos del cálculo en paralelo, si se usaron."""
+        if self._ejecutor is not None:
+            self._ejecutor.cerrar()
+            self._ejecutor = None
\ No newline at end of file
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+# Figure sin pyplot: no pasa por el backend interactivo ni queda registrada en el gestor global de
+# figuras, así que no necesita pantalla y se libera como cualquier otro objeto
+from matplotlib.figure import Figure
+import Instrumentacion
+
+# Figura reutilizada por el proceso (una por trabajador): (figura, ejes, línea)
+_figura = None
+
+def _obtener_figura(tamano=(10, 6), dpi=100):
+    global _figura
+    if _figura is None:
+        figura = Figure(figsize=tamano, dpi=dpi)
+        ejes = figura.add_subplot()
+        linea, = ejes.plot([], [], color='blue')
+        ejes.set_xlabel('Distancia (km)')
+        ejes.set_ylabel('Atenuación (dB)')
+        ejes.grid(True)
+        _figura = (figura, ejes, linea)
+    return _figura
+
+def liberar_figura():
+    """Libera la figura reutilizada del proceso; la próxima curva crea una nueva."""
+    global _figura
+    if _figura is not None:
+        _figura[0].clear()
+        _figura = None
+
+@Instrumentacion.medido("GraficasLote.guardar_curva")
+def guardar_curva(ruta, distancias, perdidas, titulo='Atenuación vs. Distancia', etiqueta='Pérdidas vs. Distancia',
+                  tamano=(10, 6), dpi=100):
+    """Dibuja una curva de pérdidas (dB) vs. distancia (km) y la guarda en `ruta` (formato según la extensión).
+
+    Se reutilizan la figura, los ejes y la línea del proceso: solo cambian los
+    datos, el título y la leyenda.
+    """
+    # Las pérdidas de losses_complete pueden venir como arreglos de un elemento: se aplanan
+    distancias, perdidas = np.ravel(distancias).astype(float), np.ravel(perdidas).astype(float)
+    if len(distancias) != len(perdidas):
+        raise ValueError(f"Distancias ({len(distancias)}) y pérdidas ({len(perdidas)}) no coinciden")
+    figura, ejes, linea = _obtener_figura(tamano, dpi)
+    linea.set_data(distancias, perdidas)
+    linea.set_label(etiqueta)
+    ejes.set_title(titulo)
+    ejes.relim()
+    ejes.autoscale_view()
+    ejes.legend()
+    figura.savefig(ruta)
+    return ruta
+
+def _inicializar_trabajador(tamano, dpi):
+    _obtener_figura(tamano, dpi)
+
+def _renderizar_lote(curvas):
+    salida = []
+    for curva in curvas:
+        try:
+            guardar_curva(curva['ruta'], curva['distancias'], curva['perdidas'],
+                          **{clave: curva[clave] for clave in ('titulo', 'etiqueta') if clave in curva})
+            salida.append((curva['ruta'], None))
+        except Exception as e:
+            salida.append((curva['ruta'], f"{type(e).__name__}: {e}"))
+    return salida
+
+class GraficasLote:
+    """Genera muchas gráficas de pérdidas vs. distancia en archivos PNG/SVG, sin pantalla, en paralelo.
+
+    Cada trabajador crea una sola figura y la reutiliza para todas sus
+    curvas (ver `guardar_curva`), así la memoria no crece con el número de
+    gráficas. Las curvas se envían en lotes de `tam_lote` y como mucho hay dos
+    lotes pendientes por trabajador, así tampoco crece la memoria del proceso
+    principal cuando las curvas vienen de un generador.
+    """
+
+    def __init__(self, max_workers=None, tamano=(10, 6), dpi=100, tam_lote=32):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.tamano = tamano
+        self.dpi = dpi
+        self.tam_lote = tam_lote
+
+    def _lotes(self, curvas, errores):
+        lote = []
+        for curva in curvas:
+            if "error" in curva:
+                errores[curva["ruta"]] = curva["error"]
+                continue
+            lote.append(curva)
+            if len(lote) == self.tam_lote:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+    def renderizar(self, curvas):
+        """Guarda cada curva (dict con `ruta`, `distancias` en km, `perdidas` en dB y opcionalmente `titulo` y `etiqueta`).
+
+        Devuelve un dict con las rutas generadas y los errores por ruta. Una
+        curva con `error` (p. ej. una línea inválida de un archivo JSON Lines)
+        no se dibuja: su error queda en el resumen y se sigue con las demás.
+        """
+        resumen = {"generadas": [], "errores": {}}
+
+        def reunir(futuros):
+            for futuro in futuros:
+                for ruta, error in futuro.result():
+                    if error is None:
+                        resumen["generadas"].append(ruta)
+                    else:
+                        resumen["errores"][ruta] = error
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_inicializar_trabajador,
+                                 initargs=(self.tamano, self.dpi)) as executor:
+            pendientes = set()
+            for lote in self._lotes(curvas, resumen["errores"]):
+                if len(pendientes) >= 2 * self.max_workers:
+                    listos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    reunir(listos)
+                pendientes.add(executor.submit(_renderizar_lote, lote))
+            reunir(wait(pendientes).done)
+        resumen["generadas"].sort()
+        return resumen
+
+def curvas_sinteticas(n, directorio, formato="png", puntos=100, frecuencia_mhz=850.):
+    """Curvas de espacio libre con pendientes distintas, para medir el rendimiento."""
+    distancias = np.linspace(0.1, 30, puntos)
+    for i in range(n):
+        exponente = 2 + 2 * i / max(n - 1, 1)
+        yield {
+            "ruta": os.path.join(directorio, f"curva_{i:05d}.{formato}"),
+            "distancias": distancias,
+            "perdidas": 10 * exponente * np.log10(distancias) + 20 * np.log10(frecuencia_mhz) + 32.44,
+            "titulo": f"Curva {i} (exponente {exponente:.2f})",
+        }
+
+def _leer_curvas(ruta_jsonl, directorio, formato):
+    with open(ruta_jsonl) as f:
+        for numero, linea in enumerate(f, 1):
+            if not linea.strip():
+                continue
+            # Una línea inválida se registra con su número en lugar de la ruta y no detiene el lote
+            try:
+                datos = json.loads(linea)
+                curva = {
+                    "ruta": os.path.join(directorio, f"{datos['nombre']}.{formato}"),
+                    "distancias": datos["distancias_km"],
+                    "perdidas": datos["perdidas_db"],
+                    **{clave: datos[clave] for clave in ("titulo", "etiqueta") if clave in datos},
+                }
+            except (ValueError, KeyError, TypeError) as e:
+                curva = {"ruta": f"{ruta_jsonl}:{numero}", "error": f"{type(e).__name__}: {e}"}
+            yield curva
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gráficas de pérdidas vs. distancia en lote, sin pantalla")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    renderizar = subcomandos.add_parser(
+        "renderizar", help="Una gráfica por línea de un archivo JSON Lines "
+                           "({'nombre', 'distancias_km', 'perdidas_db'[, 'titulo', 'etiqueta']})")
+    renderizar.add_argument("curvas")
+    medir = subcomandos.add_parser("medir", help="Genera curvas sintéticas y mide gráficas/s y memoria")
+    medir.add_argument("--n", type=int, default=1000)
+    for subcomando in (renderizar, medir):
+        subcomando.add_argument("directorio", help="Directorio de salida")
+        subcomando.add_argument("--formato", choices=("png", "svg"), default="png")
+        subcomando.add_argument("--trabajadores", type=int, default=None)
+        subcomando.add_argument("--dpi", type=int, default=100)
+    args = parser.parse_args()
+
+    os.makedirs(args.directorio, exist_ok=True)
+    if args.comando == "renderizar":
+        curvas = _leer_curvas(args.curvas, args.directorio, args.formato)
+    else:
+        curvas = curvas_sinteticas(args.n, args.directorio, args.formato)
+    inicio = time.perf_counter()
+    resumen = GraficasLote(args.trabajadores, dpi=args.dpi).renderizar(curvas)
+    segundos = time.perf_counter() - inicio
+    generadas = len(resumen["generadas"])
+    try:
+        import resource
+        memoria = f", memoria máxima por trabajador: {resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024:.0f} MB"
+    except ImportError:  # Windows
+        memoria = ""
+    print(f"Generadas: {generadas} en {segundos:.1f} s ({generadas / segundos:.1f} gráficas/s){memoria}")
+    for ruta, error in resumen["errores"].items():
+        print(f"Error en {ruta}: {error}")
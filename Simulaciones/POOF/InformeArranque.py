@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+# Línea de `python -X importtime`: "import time: propio | acumulado | <sangría>módulo" (microsegundos)
+PATRON_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+def medir_importaciones(modulo, directorio="."):
+    """Importa `modulo` en un intérprete nuevo con -X importtime y devuelve una fila por módulo cargado.
+
+    Cada fila tiene `modulo`, `propio_ms`, `acumulado_ms` y `nivel` (0 para
+    `modulo`, que es el último de la lista, y para lo que importa el propio
+    intérprete al arrancar; 1 para las importaciones directas de `modulo`).
+    """
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=directorio, capture_output=True, text=True,
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}:\n{proceso.stderr[-2000:]}")
+    filas = []
+    for linea in proceso.stderr.splitlines():
+        coincidencia = PATRON_IMPORTTIME.match(linea)
+        if coincidencia:
+            propio, acumulado, sangria, nombre = coincidencia.groups()
+            filas.append({
+                "modulo": nombre, "propio_ms": int(propio) / 1e3, "acumulado_ms": int(acumulado) / 1e3,
+                "nivel": (len(sangria) - 1) // 2,
+            })
+    return filas
+
+def costo_por_paquete(filas):
+    """Tiempo propio sumado por paquete de primer nivel (numpy, astropy, pycraf, ...), de mayor a menor."""
+    totales = defaultdict(float)
+    for fila in filas:
+        totales[fila["modulo"].split(".")[0]] += fila["propio_ms"]
+    return sorted(totales.items(), key=lambda par: par[1], reverse=True)
+
+def medir_primer_menu(script, directorio=".", marca="Seleccione una opción", entrada="9\n", limite_s=120):
+    """Segundos desde que se lanza `script` hasta que escribe `marca` (el primer prompt).
+
+    Después se envía `entrada` para que el programa termine.
+    """
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-u", script], cwd=directorio, stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    marca = marca.encode()
+    leido = b""
+    try:
+        while marca not in leido:
+            caracter = proceso.stdout.read(1)
+            if not caracter or time.perf_counter() - inicio > limite_s:
+                raise RuntimeError(f"{script} terminó o tardó demasiado sin mostrar '{marca.decode()}'")
+            leido += caracter
+        segundos = time.perf_counter() - inicio
+        proceso.communicate(entrada.encode(), timeout=limite_s)
+    finally:
+        if proceso.poll() is None:
+            proceso.kill()
+    return segundos
+
+def subarbol(filas):
+    """Filas del último módulo de nivel 0 (el importado) y de todo lo que importó; sin el arranque del intérprete."""
+    inicio = max((i for i, fila in enumerate(filas[:-1]) if fila["nivel"] == 0), default=-1) + 1
+    return filas[inicio:]
+
+def informe(modulo, directorio=".", top=15):
+    """Arma el informe de arranque de `modulo` como dict."""
+    filas = subarbol(medir_importaciones(modulo, directorio))
+    return {
+        "modulo": modulo,
+        "directorio": os.path.abspath(directorio),
+        "total_ms": filas[-1]["acumulado_ms"] if filas else 0.0,
+        "directas": [fila for fila in filas if fila["nivel"] == 1],
+        "mas_costosos": sorted(filas, key=lambda fila: fila["acumulado_ms"], reverse=True)[:top],
+        "por_paquete": costo_por_paquete(filas)[:top],
+    }
+
+def imprimir_informe(datos):
+    print(f"\nImportación de {datos['modulo']} ({datos['directorio']}): {datos['total_ms']:.1f} ms")
+    print("\nImportaciones directas (acumulado):")
+    for fila in sorted(datos["directas"], key=lambda fila: fila["acumulado_ms"], reverse=True):
+        print(f"  {fila['acumulado_ms']:9.1f} ms  {fila['modulo']}")
+    print("\nPaquetes (tiempo propio sumado):")
+    for paquete, ms in datos["por_paquete"]:
+        print(f"  {ms:9.1f} ms  {paquete}")
+    if "primer_menu_s" in datos:
+        print(f"\nTiempo hasta el primer menú: {datos['primer_menu_s'] * 1e3:.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Informe del costo de importación y del tiempo hasta el primer menú")
+    parser.add_argument("modulo", nargs="?", default="Controlador", help="Módulo a importar (por defecto Controlador)")
+    parser.add_argument("--directorio", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="Directorio desde el que se importa (p. ej. ../../radio-wave-attenuation)")
+    parser.add_argument("--script", help="Script interactivo para medir el tiempo hasta el primer prompt (p. ej. Main.py)")
+    parser.add_argument("--marca", default="Seleccione una opción", help="Texto del primer prompt del script")
+    parser.add_argument("--entrada", default="9\n", help="Texto enviado tras el prompt para salir")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="Guarda el informe en este archivo JSON")
+    parser.add_argument("--presupuesto-ms", type=float,
+                        help="Termina con código 1 si la importación (o el primer menú) supera este tiempo")
+    args = parser.parse_args()
+
+    datos = informe(args.modulo, args.directorio, args.top)
+    if args.script:
+        datos["primer_menu_s"] = medir_primer_menu(args.script, args.directorio, args.marca,
+                                                   args.entrada.encode().decode("unicode_escape"))
+    imprimir_informe(datos)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(datos, f, indent=2)
+
+    if args.presupuesto_ms is not None:
+        medido = max(datos["total_ms"], datos.get("primer_menu_s", 0.0) * 1e3)
+        if medido > args.presupuesto_ms:
+            print(f"\nSe superó el presupuesto: {medido:.1f} ms > {args.presupuesto_ms:.1f} ms")
+            sys.exit(1)
@@ -0,0 +1,207 @@
+import argparse
+import atexit
+import functools
+import json
+import multiprocessing.util
+import os
+import random
+import sys
+import threading
+import time
+
+# Con esta variable de entorno la medición se activa al importar el módulo. Su valor es la ruta del
+# informe que se escribe al terminar (.json, o pilas colapsadas para flamegraph.pl/speedscope con
+# cualquier otra extensión); "1" solo imprime la tabla en stderr. Los procesos trabajadores (p. ej. los
+# de EjecutorEnlaces) heredan la variable y escriben su propio informe, con su pid en el nombre.
+VARIABLE_ENTORNO = "POOF_INSTRUMENTACION"
+# Duraciones guardadas por etapa para el percentil 95 (muestreo de reservorio por encima de este número)
+MUESTRAS_MAX = 10_000
+
+_activa = False
+_candado = threading.Lock()
+_local = threading.local()
+# Ruta de pila ("Graficas.perdidas_vs_distancia;MotorP452.perfil") -> [llamadas, total_ns, bytes, muestras_ns]
+_registros = {}
+_informe_al_salir = None
+_guardado = False
+
+class _Etapa:
+    """Etapa medida: se usa con `with`; `bytes` se puede asignar dentro del bloque."""
+    __slots__ = ("nombre", "bytes", "_ruta", "_inicio")
+
+    def __init__(self, nombre, bytes_leidos=0):
+        self.nombre = nombre
+        self.bytes = bytes_leidos
+
+    def __enter__(self):
+        pila = getattr(_local, "pila", None)
+        if pila is None:
+            pila = _local.pila = []
+        pila.append(self.nombre)
+        self._ruta = ";".join(pila)
+        self._inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *_):
+        duracion = time.perf_counter_ns() - self._inicio
+        _local.pila.pop()
+        with _candado:
+            registro = _registros.get(self._ruta)
+            if registro is None:
+                registro = _registros[self._ruta] = [0, 0, 0, []]
+            registro[0] += 1
+            registro[1] += duracion
+            registro[2] += self.bytes
+            muestras = registro[3]
+            if len(muestras) < MUESTRAS_MAX:
+                muestras.append(duracion)
+            else:
+                indice = random.randrange(registro[0])
+                if indice < MUESTRAS_MAX:
+                    muestras[indice] = duracion
+
+class _EtapaNula:
+    """Etapa sin medición (instrumentación desactivada): no hace nada."""
+    __slots__ = ("bytes",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        pass
+
+_NULA = _EtapaNula()
+
+def activa():
+    return _activa
+
+def activar(ruta_informe=None):
+    """Activa la medición; con `ruta_informe` el informe se guarda al terminar el proceso."""
+    global _activa, _informe_al_salir
+    _activa = True
+    if ruta_informe and _informe_al_salir is None:
+        atexit.register(_guardar_al_salir)
+    _informe_al_salir = ruta_informe or _informe_al_salir
+
+def desactivar():
+    global _activa
+    _activa = False
+
+def reiniciar():
+    """Descarta lo medido hasta ahora."""
+    with _candado:
+        _registros.clear()
+
+def etapa(nombre, bytes_leidos=0):
+    """Context manager que mide una etapa; anidadas, forman una pila (p. ej. para un flamegraph).
+
+    Desactivada la instrumentación devuelve un objeto compartido que no mide nada.
+    """
+    return _Etapa(nombre, bytes_leidos) if _activa else _NULA
+
+def medido(nombre):
+    """Decorador: mide cada llamada a la función como la etapa `nombre`."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activa:
+                return funcion(*args, **kwargs)
+            with _Etapa(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+def _percentil(muestras, q):
+    ordenadas = sorted(muestras)
+    return ordenadas[min(len(ordenadas) - 1, int(q / 100 * len(ordenadas)))] if ordenadas else 0
+
+def informe():
+    """Estadísticas por ruta de pila: llamadas, total (s), media, p95 y máximo muestreado (ms) y bytes."""
+    with _candado:
+        registros = {ruta: (n, total, leidos, list(muestras)) for ruta, (n, total, leidos, muestras) in _registros.items()}
+    etapas = {}
+    for ruta, (n, total, leidos, muestras) in sorted(registros.items()):
+        etapas[ruta] = {
+            "etapa": ruta.rsplit(";", 1)[-1],
+            "llamadas": n,
+            "total_s": total * 1e-9,
+            "media_ms": total / n * 1e-6,
+            "p95_ms": _percentil(muestras, 95) * 1e-6,
+            "max_ms": max(muestras) * 1e-6,
+            "bytes": leidos,
+        }
+    return {"pid": os.getpid(), "etapas": etapas}
+
+def pilas_colapsadas():
+    """Líneas "a;b;c <microsegundos propios>" (tiempo de cada pila sin el de sus etapas hijas)."""
+    with _candado:
+        totales = {ruta: registro[1] for ruta, registro in _registros.items()}
+    propios = dict(totales)
+    for ruta, total in totales.items():
+        if ";" in ruta:
+            padre = ruta.rsplit(";", 1)[0]
+            if padre in propios:
+                propios[padre] -= total
+    return [f"{ruta} {max(propio, 0) // 1000}" for ruta, propio in sorted(propios.items())]
+
+def guardar(ruta):
+    """Guarda el informe: JSON si la ruta termina en .json, pilas colapsadas en otro caso."""
+    with open(ruta, "w") as f:
+        if ruta.lower().endswith(".json"):
+            json.dump(informe(), f, indent=2)
+        else:
+            f.write("\n".join(pilas_colapsadas()) + "\n")
+    return ruta
+
+def imprimir(datos=None, archivo=None):
+    """Tabla del informe, de mayor a menor tiempo total."""
+    datos = datos or informe()
+    archivo = archivo or sys.stdout
+    print(f"{'total s':>9} {'llamadas':>9} {'media ms':>9} {'p95 ms':>9} {'MB':>8}  etapa", file=archivo)
+    for ruta, e in sorted(datos["etapas"].items(), key=lambda par: par[1]["total_s"], reverse=True):
+        sangria = "  " * ruta.count(";")
+        print(f"{e['total_s']:9.3f} {e['llamadas']:9d} {e['media_ms']:9.2f} {e['p95_ms']:9.2f} "
+              f"{e['bytes'] / 2**20:8.1f}  {sangria}{e['etapa']}", file=archivo)
+
+def _guardar_al_salir():
+    global _guardado
+    if _guardado or not _registros:
+        return
+    _guardado = True
+    if _informe_al_salir == "1":
+        imprimir(archivo=sys.stderr)
+        return
+    ruta = _informe_al_salir
+    if multiprocessing.parent_process() is not None:
+        # Un informe por trabajador, que no pisa el del proceso principal
+        base, extension = os.path.splitext(ruta)
+        ruta = f"{base}.{os.getpid()}{extension}"
+    print(f"Informe de tiempos: {guardar(ruta)}", file=sys.stderr)
+
+def _al_bifurcar():
+    # Un hijo creado con fork empieza con lo medido por el padre y, si el fork ocurrió dentro de una
+    # etapa, con su pila: se descartan para que el informe del hijo tenga solo su trabajo
+    global _candado, _local, _guardado
+    _candado = threading.Lock()
+    _local = threading.local()
+    _registros.clear()
+    _guardado = False
+
+def _al_iniciar_trabajador(_):
+    # Los trabajadores de multiprocessing creados con fork terminan con os._exit, sin pasar por atexit
+    if _informe_al_salir is not None:
+        multiprocessing.util.Finalize(None, _guardar_al_salir, exitpriority=0)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_al_bifurcar)
+multiprocessing.util.register_after_fork(_guardar_al_salir, _al_iniciar_trabajador)
+
+if os.environ.get(VARIABLE_ENTORNO):
+    activar(os.environ[VARIABLE_ENTORNO])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Muestra un informe JSON de Instrumentacion como tabla")
+    parser.add_argument("informe", help="Archivo .json escrito por Instrumentacion.guardar")
+    args = parser.parse_args()
+    with open(args.informe) as f:
+        imprimir(json.load(f))
@@ -0,0 +1,156 @@
+import numpy as np
+import pycraf
+from astropy import units as u
+from pycraf import pathprof
+from pyproj import Geod
+import Instrumentacion
+
+# Versión de pycraf con la que se comprobó que las pérdidas coinciden con las de una extracción por
+# distancia (diferencias < 1e-4 dB): el subperfil reproduce la rejilla y el suavizado de srtm_height_profile
+VERSION_PYCRAF = "2.1.0"
+_version_avisada = False
+
+class MotorP452:
+    """Pérdidas P.452 a varias distancias sobre un mismo azimut con una sola extracción de perfil.
+
+    El perfil de alturas se extrae una vez hasta la distancia máxima, con la
+    resolución propia de los datos SRTM. Cada distancia usa un subperfil con
+    las mismas muestras que extraería `srtm_height_profile` para ella (con el
+    mismo suavizado gaussiano cuando el paso pedido es mayor que la
+    resolución de los datos, interpolando el perfil compartido cuando es
+    menor) y se pasa a `losses_complete` con `hprof_*`. Con otra versión de
+    pycraf que `VERSION_PYCRAF` se avisa una vez, porque la rejilla puede
+    haber cambiado.
+    Con `cache_perfiles` (CachePerfiles) los perfiles ya extraídos se leen
+    del disco sin consultar los datos SRTM, y con `almacen_srtm`
+    (AlmacenSRTM) los perfiles se extraen de teselas locales, sin red.
+    """
+
+    def __init__(self, frequency=0.85 * u.GHz, temperature=310. * u.K, pressure=980 * u.hPa,
+                 h_tg=20 * u.m, h_rg=30 * u.m, time_percent=0.1 * u.percent, cache_perfiles=None,
+                 almacen_srtm=None):
+        self.frequency = frequency
+        self.temperature = temperature
+        self.pressure = pressure
+        self.h_tg = h_tg
+        self.h_rg = h_rg
+        self.time_percent = time_percent
+        self.cache_perfiles = cache_perfiles
+        self.almacen_srtm = almacen_srtm
+        self.geod = Geod(ellps='WGS84')
+
+        global _version_avisada
+        if pycraf.__version__ != VERSION_PYCRAF and not _version_avisada:
+            _version_avisada = True
+            print(f"Advertencia: MotorP452 se comprobó con pycraf {VERSION_PYCRAF} (instalado: {pycraf.__version__}); "
+                  "las pérdidas pueden diferir de las de una extracción por distancia.")
+
+    def preparar_ruta(self, lon_t, lat_t, azimut, distancias, pasos):
+        """Posiciones de los receptores y perfil compartido para todas las distancias.
+
+        `distancias` y `pasos` son Quantity del mismo largo. Devuelve un dict
+        con los receptores (`lons_r`, `lats_r` en grados y sus contra-azimuts)
+        y el perfil de alturas hasta la distancia máxima.
+        """
+        distancias_m = distancias.to_value(u.m)
+        n = len(distancias_m)
+        with Instrumentacion.etapa("MotorP452.geodesica"):
+            lons_r, lats_r, _ = self.geod.fwd(
+                np.full(n, lon_t.to_value(u.deg)), np.full(n, lat_t.to_value(u.deg)), np.full(n, azimut), distancias_m
+            )
+            distancia_maxima = distancias_m.max() + pasos.to_value(u.m).max()
+            lon_fin, lat_fin, _ = self.geod.fwd(lon_t.to_value(u.deg), lat_t.to_value(u.deg), azimut, distancia_maxima)
+            # Distancia y azimuts de cada receptor con las geodésicas de pycraf, como en srtm_height_profile:
+            # la distancia fija cuántas muestras tiene su perfil
+            distancias_pycraf, azimuts, azimuts_r = pathprof.geoid_inverse(
+                np.full(n, lon_t.to_value(u.deg)) * u.deg, np.full(n, lat_t.to_value(u.deg)) * u.deg,
+                lons_r * u.deg, lats_r * u.deg,
+            )
+        perfil = self.extraer_perfil(lon_t.to_value(u.deg), lat_t.to_value(u.deg), lon_fin, lat_fin)
+
+        return {
+            'lon_t': lon_t, 'lat_t': lat_t, 'azimut': azimut,
+            'distancias': distancias, 'pasos': pasos, 'distancias_pycraf': distancias_pycraf.to_value(u.m),
+            'lons_r': lons_r, 'lats_r': lats_r,
+            'azimuts': azimuts.to_value(u.deg), 'contra_azimuts': azimuts_r.to_value(u.deg) % 360 - 180,
+            'dist_perfil': perfil['distancias'], 'alturas': perfil['alturas'],
+            'hgt_res': perfil['hgt_res'], 'paso_perfil': perfil['paso'],
+        }
+
+    @Instrumentacion.medido("MotorP452.perfil")
+    def extraer_perfil(self, lon_t, lat_t, lon_fin, lat_fin):
+        """Perfil (en grados y metros) con la resolución propia de los datos SRTM."""
+        if self.cache_perfiles is not None:
+            return self.cache_perfiles.perfil(lon_t, lat_t, lon_fin, lat_fin, almacen=self.almacen_srtm)
+        if self.almacen_srtm is not None:
+            return self.almacen_srtm.perfil(lon_t, lat_t, lon_fin, lat_fin)
+
+        # Se consulta una altura para que SrtmConf conozca la resolución de las teselas
+        pathprof.srtm_height_data(lon_t * u.deg, lat_t * u.deg)
+        hgt_res = pathprof.SrtmConf.hgt_res
+        _, _, _, distancias, alturas, bearing, _, _ = pathprof.srtm_height_profile(
+            lon_t * u.deg, lat_t * u.deg, lon_fin * u.deg, lat_fin * u.deg, hgt_res / 3. * u.m
+        )
+        return {
+            'distancias': distancias.to_value(u.m), 'alturas': alturas.to_value(u.m),
+            'bearing': bearing.to_value(u.deg), 'paso': hgt_res / 3., 'hgt_res': hgt_res,
+        }
+
+    @Instrumentacion.medido("MotorP452.subperfil")
+    def subperfil(self, ruta, indice):
+        """Distancias (km) y alturas (m) del perfil del receptor `indice`, como las de srtm_height_profile."""
+        distancia = ruta['distancias_pycraf'][indice]
+        paso = ruta['pasos'][indice].to_value(u.m)
+        # Misma rejilla que srtm_height_profile: la última muestra puede quedar hasta un paso después del
+        # receptor, y su altura es la que pycraf usa como la del receptor
+        distancias = np.arange(0., distancia + paso, paso)
+
+        paso_perfil = ruta['paso_perfil']
+        if paso > ruta['hgt_res'] / 1.5:
+            # Promedio gaussiano de regrid1d_with_x (ancho paso / 2.35, ventana de ±5 anchos con su mismo
+            # redondeo) sobre las muestras del perfil compartido que extraería pycraf para esta distancia
+            n = len(np.arange(0., distancia + paso_perfil, paso_perfil))
+            x, y = ruta['dist_perfil'][:n], ruta['alturas'][:n]
+            ancho = paso / 2.35
+            dx = abs(x[0] - x[-1]) / n
+            inicios = np.maximum(((distancias - 5. * ancho) / dx - 0.5).astype(int), 0)
+            fines = np.minimum(((distancias + 5. * ancho) / dx + 1.5).astype(int), n)
+            indices = inicios[:, None] + np.arange((fines - inicios).max())
+            validos = indices < fines[:, None]
+            indices = np.minimum(indices, n - 1)
+            pesos = np.where(validos, np.exp(-0.5 * ((x[indices] - distancias[:, None]) / ancho) ** 2), 0.)
+            norma = pesos.sum(axis=1)
+            alturas = np.where(norma < 1.e-12, 0., (pesos * y[indices]).sum(axis=1) / np.maximum(norma, 1.e-300))
+        else:
+            # Con pasos finos pycraf consulta la altura en cada muestra; aquí se interpola el perfil
+            # compartido (muestras cada hgt_res / 3), así no se vuelven a consultar los datos SRTM
+            alturas = np.interp(distancias, ruta['dist_perfil'], ruta['alturas'])
+
+        # Con hprof_* losses_complete toma la longitud del trayecto de la última distancia, que sin
+        # hprof_* es la del receptor aunque la muestra quede más lejos: se corre la última al receptor
+        distancias[-1] = distancia
+        return distancias * 1.e-3 * u.km, alturas * u.m
+
+    @Instrumentacion.medido("MotorP452.perdidas")
+    def perdidas(self, ruta, indice, zone_t, zone_r):
+        """Resultados de `losses_complete` para el receptor `indice` de la ruta."""
+        distancias, alturas = self.subperfil(ruta, indice)
+        # d_tm y d_lm quedan en su valor por omisión, la longitud del trayecto (la última distancia del
+        # subperfil, que está en el receptor)
+        with Instrumentacion.etapa("pathprof.losses_complete"):
+            return pathprof.losses_complete(
+                self.frequency,
+                self.temperature,
+                self.pressure,
+                ruta['lon_t'], ruta['lat_t'],
+                ruta['lons_r'][indice] * u.deg, ruta['lats_r'][indice] * u.deg,
+                self.h_tg, self.h_rg,
+                ruta['pasos'][indice],
+                self.time_percent,
+                zone_t=zone_t,
+                zone_r=zone_r,
+                hprof_dists=distancias,
+                hprof_heights=alturas,
+                hprof_bearing=ruta['azimuts'][indice] * u.deg,
+                hprof_backbearing=ruta['contra_azimuts'][indice] * u.deg,
+            )
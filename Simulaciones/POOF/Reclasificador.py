@@ -0,0 +1,99 @@
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+class Reclasificador:
+    # Tabla de reclasificación de ESA a Corine
+    ESA_A_CORINE = {
+        10: 311,  # Tree cover -> Bosques de hoja ancha
+        20: 322,  # Shrubland -> Matorrales
+        30: 321,  # Grassland -> Pastizales naturales
+        40: 211,  # Cropland -> Tierras de cultivo no irrigadas
+        50: 111,  # Built-up -> Tejido urbano continuo
+        60: 332,  # Bare / sparse vegetation -> Rocas desnudas
+        70: 335,  # Snow and ice -> Glaciares y nieves perpetuas
+        80: 512,  # Permanent water bodies -> Masas de agua
+        90: 411,  # Herbaceous wetland -> Marismas interiores
+        95: 421,  # Mangroves -> Marismas salinas
+        100: 322, # Moss and lichen -> Matorrales
+        0: 512    # Masas de agua -> Masas de agua
+    }
+
+    # Tabla de mapeo para categorías adicionales de Corine
+    CORINE_ADICIONAL = {
+        55: 311,  # Tree cover -> Bosques de hoja ancha
+        65: 211,  # Cropland -> Tierras de cultivo no irrigadas
+        66: 322,  # Shrubland -> Matorrales
+        76: 421,  # Mangroves -> Marismas salinas
+        155: 411  # Herbaceous wetland -> Marismas interiores
+    }
+
+    # Tamaño de tesela del GeoTIFF de salida (también es el alto de cada franja procesada)
+    TAMANO_TESELA = 512
+
+    def __init__(self, tabla, valor_defecto=None, dtype_salida=np.int16):
+        """`valor_defecto`: valor para clases fuera de la tabla; None las conserva sin cambios."""
+        self.tabla = dict(tabla)
+        self.valor_defecto = valor_defecto
+        self.dtype_salida = np.dtype(dtype_salida)
+        self._luts = {}
+
+    def construir_lut(self, dtype_entrada):
+        """Tabla de consulta indexada por el valor del píxel (tipos enteros de 8 o 16 bits).
+
+        Los tipos con signo se indexan por su representación sin signo del mismo
+        ancho, así cada píxel se reclasifica con una sola lectura de la tabla.
+        """
+        dtype_entrada = np.dtype(dtype_entrada)
+        if dtype_entrada.kind not in "ui" or dtype_entrada.itemsize > 2:
+            return None
+        if dtype_entrada not in self._luts:
+            sin_signo = np.dtype(f"u{dtype_entrada.itemsize}")
+            valores = np.arange(2 ** (8 * dtype_entrada.itemsize), dtype=sin_signo).view(dtype_entrada)
+            if self.valor_defecto is None:
+                lut = valores.astype(self.dtype_salida)
+            else:
+                lut = np.full(len(valores), self.valor_defecto, dtype=self.dtype_salida)
+            for valor_original, valor_nuevo in self.tabla.items():
+                lut[np.array(valor_original, dtype=dtype_entrada).view(sin_signo)] = valor_nuevo
+            self._luts[dtype_entrada] = lut
+        return self._luts[dtype_entrada]
+
+    def reclasificar(self, bloque):
+        """Reclasifica un arreglo con una sola pasada."""
+        lut = self.construir_lut(bloque.dtype)
+        if lut is not None:
+            return lut[bloque.view(f"u{bloque.dtype.itemsize}")]
+
+        # Tipos sin tabla directa: una consulta por valor distinto del bloque
+        valores, inverso = np.unique(bloque, return_inverse=True)
+        nuevos = np.array(
+            [self.tabla.get(v, v if self.valor_defecto is None else self.valor_defecto) for v in valores.tolist()],
+            dtype=self.dtype_salida,
+        )
+        return nuevos[inverso].reshape(bloque.shape)
+
+    def reclasificar_archivo(self, ruta_entrada, ruta_salida, etiquetas=None):
+        """Reclasifica un GeoTIFF por franjas y escribe un GeoTIFF teselado y comprimido.
+
+        Solo una franja de `TAMANO_TESELA` filas está en memoria a la vez.
+        `etiquetas` se guardan como metadatos del GeoTIFF de salida.
+        """
+        with rasterio.open(ruta_entrada) as src:
+            profile = src.profile
+            profile.update(
+                dtype=self.dtype_salida.name,
+                tiled=True,
+                blockxsize=self.TAMANO_TESELA,
+                blockysize=self.TAMANO_TESELA,
+                compress="deflate",
+                predictor=2,
+                BIGTIFF="IF_SAFER",
+            )
+            with rasterio.open(ruta_salida, "w", **profile) as dst:
+                if etiquetas:
+                    dst.update_tags(**etiquetas)
+                for fila in range(0, src.height, self.TAMANO_TESELA):
+                    ventana = Window(0, fila, src.width, min(self.TAMANO_TESELA, src.height - fila))
+                    dst.write(self.reclasificar(src.read(1, window=ventana)), 1, window=ventana)
+        return ruta_salida
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import signal
+import socketserver
+import threading
+import time
+from collections import deque
+import numpy as np
+from astropy import units as u
+from pycraf import pathprof
+from ArchivoTIF import ArchivoTIF
+from Coordenadas import Coordenadas
+from EjecutorEnlaces import EjecutorEnlaces
+
+def _a_json(valor):
+    """Valores de numpy/astropy como tipos simples de JSON (los arreglos de un elemento, como número)."""
+    valor = np.asarray(getattr(valor, 'value', valor))
+    if valor.size == 1:
+        valor = valor.reshape(())
+    valor = valor.tolist()
+    if isinstance(valor, float) and not np.isfinite(valor):
+        return None
+    return valor
+
+class _Manejador(socketserver.StreamRequestHandler):
+    """Una conexión: una solicitud JSON por línea, una respuesta JSON por línea, en orden."""
+
+    def handle(self):
+        for linea in self.rfile:
+            if not linea.strip():
+                continue
+            respuesta = self.server.servicio.atender(linea)
+            self.wfile.write(json.dumps(respuesta).encode() + b"\n")
+            self.wfile.flush()
+
+class _ServidorTCP(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+class ServidorConsultas:
+    """Servicio local que mantiene cargados el archivo de cobertura de suelo, sus zonas P.452 y los modelos.
+
+    El archivo y su conversión a P.452 se cargan una sola vez al iniciar; los
+    enlaces se evalúan en un EjecutorEnlaces persistente, cuyos trabajadores
+    también cargan el archivo una sola vez. Escucha en localhost (TCP) o en un
+    socket Unix con un protocolo de líneas JSON (ver ClienteConsultas). Cada
+    conexión se atiende en su propio hilo, pero como mucho `max_concurrentes`
+    solicitudes se calculan a la vez; el resto espera su turno. Cada
+    respuesta informa la latencia y la espera de la solicitud.
+    """
+
+    def __init__(self, ruta_clutter, max_workers=None, max_concurrentes=4, historial=1000, **parametros):
+        self.archivo_tif = ArchivoTIF(ruta_clutter)
+        self.archivo_tif.cargar_archivo()
+        if self.archivo_tif.datos is not None:
+            self.archivo_tif.obtener_zonas_p452()
+        self.coordenadas = Coordenadas(self.archivo_tif)
+        self.ejecutor = EjecutorEnlaces(max_workers, ruta_clutter, **parametros)
+        self.ejecutor.iniciar()  # los trabajadores cargan el archivo antes de la primera consulta
+
+        self.max_concurrentes = max_concurrentes
+        self._turnos = threading.BoundedSemaphore(max_concurrentes)
+        self._candado = threading.Lock()
+        self._latencias = deque(maxlen=historial)
+        self.solicitudes = 0
+        self.errores = 0
+        self.en_curso = 0
+        self.inicio = time.time()
+        self._servidor = None
+
+        self.operaciones = {
+            "zonas": self.zonas,
+            "enlaces": self.enlaces,
+            "perdidas_vs_distancia": self.perdidas_vs_distancia,
+            "estado": self.estado,
+        }
+
+    def atender(self, linea):
+        """Responde una solicitud (línea JSON con `op` y sus argumentos)."""
+        inicio = time.perf_counter()
+        identificador = None
+        try:
+            solicitud = json.loads(linea)
+            identificador = solicitud.pop("id", None)
+            operacion = self.operaciones.get(solicitud.pop("op", None))
+            if operacion is None:
+                raise ValueError(f"Operación desconocida; las disponibles son {sorted(self.operaciones)}")
+
+            if operacion == self.estado:
+                respuesta = {"ok": True, **operacion()}
+                espera = 0.0
+            else:
+                with self._turnos:
+                    espera = time.perf_counter() - inicio
+                    with self._candado:
+                        self.en_curso += 1
+                    try:
+                        respuesta = {"ok": True, **operacion(**solicitud)}
+                    finally:
+                        with self._candado:
+                            self.en_curso -= 1
+        except Exception as e:
+            espera = 0.0
+            respuesta = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+        latencia = time.perf_counter() - inicio
+        with self._candado:
+            self.solicitudes += 1
+            self.errores += not respuesta["ok"]
+            self._latencias.append(latencia)
+        respuesta.update(id=identificador, latencia_ms=latencia * 1e3, espera_ms=espera * 1e3)
+        return respuesta
+
+    def zonas(self, puntos):
+        """Código de cobertura de suelo y zona P.452 de puntos [lon, lat] (None fuera del archivo)."""
+        lons, lats = np.asarray(puntos, dtype=float).reshape(-1, 2).T
+        codigos, dentro = self.coordenadas.obtener_zonas_clutter(lons, lats)
+        zonas, _ = self.coordenadas.obtener_zonas_p452(lons, lats)
+        return {
+            "codigos": [int(c) if d else None for c, d in zip(codigos, dentro)],
+            "zonas": [int(z) if d else None for z, d in zip(zonas, dentro)],
+        }
+
+    def _resultados(self, resultados, errores, claves):
+        salida = []
+        for resultado in resultados:
+            if resultado is not None:
+                resultado = {clave: _a_json(valor) for clave, valor in resultado.items() if claves is None or clave in claves}
+            salida.append(resultado)
+        return {"resultados": salida, "errores": {str(indice): error for indice, error in errores.items()}}
+
+    def enlaces(self, enlaces, paso_m=100., claves=None):
+        """Pérdidas de enlaces [lon_t, lat_t, lon_r, lat_r(, zone_t, zone_r)] (ver EjecutorEnlaces.ejecutar)."""
+        resultados, errores = self.ejecutor.ejecutar(enlaces, paso_m * u.m)
+        return self._resultados(resultados, errores, claves)
+
+    def perdidas_vs_distancia(self, lon_t, lat_t, azimut, distancias_km, pasos_km=None, claves=None):
+        """Pérdidas a varias distancias sobre un azimut (ver EjecutorEnlaces.perdidas_vs_distancia)."""
+        distancias = np.asarray(distancias_km, dtype=float) * u.km
+        if pasos_km is None:
+            # Mismo criterio que Graficas: paso de 100 m, o la quinta parte de las distancias cortas
+            pasos = np.where(distancias < 0.5 * u.km, distancias / 5, 0.1 * u.km)
+        else:
+            pasos = np.asarray(pasos_km, dtype=float) * u.km
+        resultados, errores = self.ejecutor.perdidas_vs_distancia(lon_t, lat_t, azimut, distancias, pasos)
+        return self._resultados(resultados, errores, claves)
+
+    def estado(self):
+        """Contadores y latencias (ms) de las últimas solicitudes."""
+        with self._candado:
+            latencias = np.array(self._latencias) * 1e3
+            return {
+                "archivo": self.archivo_tif.ruta_archivo,
+                "trabajadores": self.ejecutor.max_workers,
+                "max_concurrentes": self.max_concurrentes,
+                "en_curso": self.en_curso,
+                "solicitudes": self.solicitudes,
+                "errores": self.errores,
+                "segundos_activo": time.time() - self.inicio,
+                "latencia_media_ms": float(latencias.mean()) if len(latencias) else None,
+                "latencia_p95_ms": float(np.percentile(latencias, 95)) if len(latencias) else None,
+            }
+
+    def servir(self, puerto=8765, socket_unix=None):
+        """Atiende conexiones hasta `detener()` (o Ctrl+C). Solo escucha en localhost o en el socket Unix."""
+        if socket_unix:
+            if os.path.exists(socket_unix):
+                os.remove(socket_unix)
+            self._servidor = _ServidorUnix(socket_unix, _Manejador)
+        else:
+            self._servidor = _ServidorTCP(("127.0.0.1", puerto), _Manejador)
+        self._servidor.servicio = self
+        try:
+            self._servidor.serve_forever()
+        finally:
+            self._servidor.server_close()
+            if socket_unix and os.path.exists(socket_unix):
+                os.remove(socket_unix)
+
+    def detener(self):
+        """Deja de aceptar conexiones (desde otro hilo) y termina los trabajadores."""
+        if self._servidor is not None:
+            self._servidor.shutdown()
+        self.ejecutor.cerrar()
+        self.archivo_tif.cerrar()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de consultas de clutter y pérdidas P.452")
+    parser.add_argument("ruta_clutter", help="GeoTIFF Corine de cobertura de suelo")
+    parser.add_argument("--puerto", type=int, default=8765, help="Puerto TCP en 127.0.0.1")
+    parser.add_argument("--socket", help="Ruta de un socket Unix (en lugar de TCP)")
+    parser.add_argument("--trabajadores", type=int, default=None, help="Procesos para evaluar enlaces")
+    parser.add_argument("--concurrencia", type=int, default=4, help="Solicitudes calculadas a la vez")
+    parser.add_argument("--srtm-local", help="Directorio de teselas .hgt locales (sin descargas)")
+    args = parser.parse_args()
+
+    def _terminar(*_):
+        raise KeyboardInterrupt
+
+    if args.srtm_local:
+        pathprof.SrtmConf.set(srtm_dir=args.srtm_local, download='never')
+    servicio = ServidorConsultas(args.ruta_clutter, args.trabajadores, args.concurrencia)
+    # SIGTERM cierra igual que Ctrl+C (se borra el socket Unix y terminan los trabajadores); se
+    # instala después de arrancar los trabajadores, que además vuelven al manejador por omisión
+    signal.signal(signal.SIGTERM, _terminar)
+    print(f"Escuchando en {args.socket or f'127.0.0.1:{args.puerto}'}")
+    try:
+        servicio.servir(args.puerto, args.socket)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.detener()
@@ -2,11 +2,13 @@
 import rasterio
 import matplotlib.pyplot as plt
 import numpy as np
+import math
+from rasterio.enums import Resampling
+from rasterio.windows import Window
 
-# Se carga el archivo reclasificado de Corine Land Cover.
+# Se abre el archivo reclasificado de Corine Land Cover; los píxeles se leen por ventanas.
 archivo_corine = 'ESA_WorldCoverSanFrancisco_reclassified_to_Corine.tif'  # Se define la ruta del archivo GeoTIFF.
-with rasterio.open(archivo_corine) as src:
-    corine_map = src.read(1)  # Se lee la primera banda del archivo.
+src = rasterio.open(archivo_corine)
 
 # Se definen colores y etiquetas para las clases de Corine Land Cover presentes.
 corine_colors = {
@@ -22,21 +24,52 @@ corine_colors = {
     512: ('blue', 'Masas de agua')                   # Agua (ESA 80)
 }
 
-# Se crea una imagen con colores personalizados.
-corine_image = np.zeros((corine_map.shape[0], corine_map.shape[1], 3), dtype=np.uint8)
+# Se crea una paleta indexada por código; la última entrada (gris) es para códigos sin color.
+paleta = np.full((max(corine_colors) + 2, 3), np.array(plt.cm.colors.to_rgb('darkgray')) * 255, dtype=np.uint8)
 for value, (color, _) in corine_colors.items():
-    mask = (corine_map == value)  # Se crea una máscara para la categoría actual.
-    corine_image[mask] = np.array(plt.cm.colors.to_rgb(color)) * 255  # Se asigna el color correspondiente.
+    paleta[value] = np.array(plt.cm.colors.to_rgb(color)) * 255
+
+def colorear(datos):
+    # Se asigna el color de cada píxel con una sola consulta a la paleta.
+    indices = datos.astype(np.intp)
+    indices[(indices < 0) | (indices >= len(paleta) - 1)] = len(paleta) - 1
+    return paleta[indices]
+
+def leer_vista(columna, fila, columna_fin, fila_fin):
+    # Se lee la ventana reducida al tamaño de la figura (resolución completa si cabe).
+    paso = max(1, math.ceil((fila_fin - fila) / alto_max), math.ceil((columna_fin - columna) / ancho_max))
+    datos = src.read(1, window=Window(columna, fila, columna_fin - columna, fila_fin - fila),
+                     out_shape=(math.ceil((fila_fin - fila) / paso), math.ceil((columna_fin - columna) / paso)),
+                     resampling=Resampling.nearest)
+    return colorear(datos), (columna, columna_fin, fila_fin, fila)
 
 # Se muestra el mapa de Corine Land Cover con una leyenda personalizada.
-plt.figure(figsize=(12, 8))
-plt.imshow(corine_image)
+fig, ax = plt.subplots(figsize=(12, 8))
+ancho_max, alto_max = (int(v) for v in fig.get_size_inches() * fig.dpi)
+corine_image, extent = leer_vista(0, 0, src.width, src.height)
+im = ax.imshow(corine_image, extent=extent, interpolation='nearest')
+ax.set_autoscale_on(False)
 plt.axis('off')  # Se ocultan los ejes.
 
+# Se vuelve a leer solo la zona visible al hacer zoom o desplazar el mapa.
+def actualizar_vista(_ax):
+    (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+    columna, fila = max(0, math.floor(x0)), max(0, math.floor(y0))
+    columna_fin, fila_fin = min(src.width, math.ceil(x1)), min(src.height, math.ceil(y1))
+    if columna_fin > columna and fila_fin > fila and (columna, columna_fin, fila_fin, fila) != tuple(im.get_extent()):
+        imagen, extent = leer_vista(columna, fila, columna_fin, fila_fin)
+        im.set_data(imagen)
+        im.set_extent(extent)
+        fig.canvas.draw_idle()
+
+ax.callbacks.connect('xlim_changed', actualizar_vista)
+ax.callbacks.connect('ylim_changed', actualizar_vista)
+
 # Se crea la leyenda.
 handles = [plt.Line2D([0], [0], marker='o', color='w', markerfacecolor=color, markersize=10, label=label)
           for value, (color, label) in corine_colors.items()]
 plt.legend(handles=handles, bbox_to_anchor=(1.05, 1), loc='upper left', title='Categorías de Corine Land Cover')
 
 plt.title('Mapa de Corine Land Cover (Reclasificado desde ESA WorldCover)')
-plt.show()
\ No newline at end of file
+plt.show()
+src.close()
\ No newline at end of file
@@ -2,12 +2,14 @@
 import rasterio
 import matplotlib.pyplot as plt
 import numpy as np
+import math
+from rasterio.enums import Resampling
+from rasterio.windows import Window
 
-# Se carga el archivo GeoTIFF de ESA WorldCover.
+# Se abre el archivo GeoTIFF de ESA WorldCover; los píxeles se leen por ventanas.
 archivo_tif = 'ESA_WorldCover_10m_2021_v200_N36W123_Map.tif'  # Se define la ruta del archivo GeoTIFF.
-with rasterio.open(archivo_tif) as src:
-    landcover_map = src.read(1)  # Se lee la primera banda del archivo.
-    transform = src.transform  # Se guarda la transformación geográfica del archivo.
+src = rasterio.open(archivo_tif)
+transform = src.transform  # Se guarda la transformación geográfica del archivo.
 
 # Se definen colores y etiquetas para cada categoría de landcover.
 landcover_colors = {
@@ -24,17 +26,42 @@ landcover_colors = {
     100: ('lightgreen', 'Musgos/líquenes')
 }
 
-# Se crea una imagen con colores personalizados.
-landcover_image = np.zeros((landcover_map.shape[0], landcover_map.shape[1], 3), dtype=np.uint8)
+# Se crea una paleta indexada por código (valores de 8 bits); los códigos sin color quedan en negro.
+paleta = np.zeros((256, 3), dtype=np.uint8)
 for value, (color, _) in landcover_colors.items():
-    mask = (landcover_map == value)  # Se crea una máscara para la categoría actual.
-    landcover_image[mask] = np.array(plt.cm.colors.to_rgb(color)) * 255  # Se asigna el color correspondiente.
+    paleta[value] = np.array(plt.cm.colors.to_rgb(color)) * 255
+
+def leer_vista(columna, fila, columna_fin, fila_fin):
+    # Se lee la ventana reducida al tamaño de la figura (resolución completa si cabe)
+    # y se asigna el color de cada píxel con una sola consulta a la paleta.
+    paso = max(1, math.ceil((fila_fin - fila) / alto_max), math.ceil((columna_fin - columna) / ancho_max))
+    datos = src.read(1, window=Window(columna, fila, columna_fin - columna, fila_fin - fila),
+                     out_shape=(math.ceil((fila_fin - fila) / paso), math.ceil((columna_fin - columna) / paso)),
+                     resampling=Resampling.nearest)
+    return paleta[datos], (columna, columna_fin, fila_fin, fila)
 
 # Se muestra el mapa de landcover con una leyenda personalizada.
 fig, ax = plt.subplots(figsize=(12, 8))
-im = ax.imshow(landcover_image)
+ancho_max, alto_max = (int(v) for v in fig.get_size_inches() * fig.dpi)
+landcover_image, extent = leer_vista(0, 0, src.width, src.height)
+im = ax.imshow(landcover_image, extent=extent, interpolation='nearest')
+ax.set_autoscale_on(False)
 plt.axis('off')  # Se ocultan los ejes.
 
+# Se vuelve a leer solo la zona visible al hacer zoom o desplazar el mapa.
+def actualizar_vista(_ax):
+    (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+    columna, fila = max(0, math.floor(x0)), max(0, math.floor(y0))
+    columna_fin, fila_fin = min(src.width, math.ceil(x1)), min(src.height, math.ceil(y1))
+    if columna_fin > columna and fila_fin > fila and (columna, columna_fin, fila_fin, fila) != tuple(im.get_extent()):
+        imagen, extent = leer_vista(columna, fila, columna_fin, fila_fin)
+        im.set_data(imagen)
+        im.set_extent(extent)
+        fig.canvas.draw_idle()
+
+ax.callbacks.connect('xlim_changed', actualizar_vista)
+ax.callbacks.connect('ylim_changed', actualizar_vista)
+
 # Se crea la leyenda.
 handles = [plt.Line2D([0], [0], marker='o', color='w', markerfacecolor=color, markersize=10, label=label)
           for value, (color, label) in landcover_colors.items()]
@@ -46,14 +73,17 @@ plt.title('Mapa de Landcover (ESA WorldCover 2020)')
 def mostrar_coordenadas(event):
     if event.inaxes == ax:
         x, y = int(event.xdata), int(event.ydata)
-        if 0 <= x < landcover_map.shape[1] and 0 <= y < landcover_map.shape[0]:
+        # Las coordenadas del eje son píxeles del archivo completo (por el extent de la imagen).
+        if 0 <= x < src.width and 0 <= y < src.height:
             # Se convierten coordenadas de píxeles a coordenadas geográficas.
             lon, lat = transform * (x, y)
-            categoria = landcover_map[y, x]
-            ax.set_title(f'Coordenadas: ({lon:.4f}, {lat:.4f}) - Categoría: {categoria} ({landcover_colors[categoria][1]})')
-            fig.canvas.draw()
+            categoria = int(src.read(1, window=Window(x, y, 1, 1))[0, 0])  # Se lee solo el píxel bajo el mouse.
+            etiqueta = landcover_colors.get(categoria, ('', 'Desconocida'))[1]
+            ax.set_title(f'Coordenadas: ({lon:.4f}, {lat:.4f}) - Categoría: {categoria} ({etiqueta})')
+            fig.canvas.draw_idle()
 
 # Se conecta la función al evento de movimiento del mouse.
 fig.canvas.mpl_connect('motion_notify_event', mostrar_coordenadas)
 
-plt.show()
\ No newline at end of file
+plt.show()
+src.close()
\ No newline at end of file
@@ -0,0 +1,97 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from controlador import Controlador, indices_opciones
+
+# Calculadora propia de cada proceso trabajador (se crea una sola vez en el inicializador)
+_calculadora = None
+
+def _inicializar_trabajador():
+    global _calculadora
+    _calculadora = Controlador()
+
+def _evaluar_bloque(indice, f_GHz, d_km, opcion_clutter, claves, directorio_salida):
+    resultados = _calculadora.calcular_lote(f_GHz, d_km, opcion_clutter)
+    if claves is not None:
+        resultados = {clave: resultados[clave] for clave in claves}
+    if directorio_salida is None:
+        return resultados
+    ruta = os.path.join(directorio_salida, f"bloque_{indice:06d}.npz")
+    np.savez(ruta, f_GHz=f_GHz, d_km=d_km, opcion_clutter=opcion_clutter, **resultados)
+    return ruta
+
+class BarridoParalelo:
+    """Barrido de parámetros dividido en bloques y evaluado en un ProcessPoolExecutor.
+
+    Las entradas se difunden a una forma común y se recorren en bloques de
+    `tam_bloque` puntos, cortados en el proceso principal sin materializar el
+    producto completo. Cada trabajador crea su `Controlador` una sola vez.
+    Como mucho `bloques_en_vuelo` bloques están pendientes a la vez, así la
+    memoria del proceso principal no crece con el tamaño del barrido.
+    `claves` limita los resultados devueltos (p. ej. ("total",)) para reducir
+    la transferencia entre procesos.
+    """
+
+    def __init__(self, max_workers=None, tam_bloque=1_000_000, bloques_en_vuelo=None,
+                 mp_context=None, claves=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.tam_bloque = tam_bloque
+        self.bloques_en_vuelo = bloques_en_vuelo or 2 * self.max_workers
+        self.mp_context = mp_context
+        self.claves = tuple(claves) if claves is not None else None
+
+    def _bloques(self, f_GHz, d_km, opcion_clutter):
+        # Las opciones se validan una vez, antes de difundirlas, como en calcular_lote (1.5 no se trunca a 1)
+        opcion_clutter = indices_opciones(opcion_clutter, Controlador().opcion_valida)
+        f_GHz, d_km, opcion_clutter = np.broadcast_arrays(
+            np.asarray(f_GHz, dtype=float), np.asarray(d_km, dtype=float), opcion_clutter
+        )
+        total = f_GHz.size
+        for indice, inicio in enumerate(range(0, total, self.tam_bloque)):
+            fin = min(inicio + self.tam_bloque, total)
+            # .flat copia solo el tramo pedido, aunque la entrada sea una vista difundida
+            yield indice, inicio, fin, f_GHz.flat[inicio:fin], d_km.flat[inicio:fin], opcion_clutter.flat[inicio:fin]
+
+    def iterar(self, f_GHz, d_km, opcion_clutter, directorio_salida=None):
+        """Genera (inicio, fin, resultado) en orden; el resultado es un dict de arreglos o la ruta del bloque."""
+        if directorio_salida is not None:
+            os.makedirs(directorio_salida, exist_ok=True)
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context,
+                                 initializer=_inicializar_trabajador) as executor:
+            pendientes = deque()
+            for indice, inicio, fin, f, d, opcion in self._bloques(f_GHz, d_km, opcion_clutter):
+                pendientes.append((inicio, fin, executor.submit(
+                    _evaluar_bloque, indice, f, d, opcion, self.claves, directorio_salida
+                )))
+                if len(pendientes) >= self.bloques_en_vuelo:
+                    inicio_listo, fin_listo, futuro = pendientes.popleft()
+                    yield inicio_listo, fin_listo, futuro.result()
+            while pendientes:
+                inicio_listo, fin_listo, futuro = pendientes.popleft()
+                yield inicio_listo, fin_listo, futuro.result()
+
+    def ejecutar(self, f_GHz, d_km, opcion_clutter, directorio_salida=None):
+        """Ejecuta el barrido completo.
+
+        Sin `directorio_salida` devuelve un dict de arreglos con la forma difundida
+        de las entradas, como `Controlador.calcular_lote`. Con `directorio_salida`
+        cada trabajador escribe su bloque en un .npz y se devuelve la lista
+        ordenada de rutas, sin reunir los resultados en el proceso principal.
+        """
+        forma = np.broadcast_shapes(np.shape(f_GHz), np.shape(d_km), np.shape(opcion_clutter))
+        if directorio_salida is not None:
+            return [ruta for _, _, ruta in self.iterar(f_GHz, d_km, opcion_clutter, directorio_salida)]
+
+        resultados = None
+        for inicio, fin, bloque in self.iterar(f_GHz, d_km, opcion_clutter):
+            if resultados is None:
+                resultados = {clave: np.empty(int(np.prod(forma))) for clave in bloque}
+            for clave, valores in bloque.items():
+                resultados[clave][inicio:fin] = valores
+        if resultados is None:
+            # Barrido vacío: mismas claves y forma que el cálculo directo
+            resultados = Controlador().calcular_lote(f_GHz, d_km, opcion_clutter)
+            return {clave: resultados[clave] for clave in (self.claves or resultados)}
+        return {clave: valores.reshape(forma) for clave, valores in resultados.items()}
@@ -0,0 +1,152 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+from controlador import Controlador
+
+TAMANOS_POR_DEFECTO = (1, 10, 1_000, 100_000, 10_000_000)
+
+def _entradas(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return rng.uniform(0.1, 6.0, n), rng.uniform(0.01, 20.0, n)
+
+def _casos(calculadora):
+    """Devuelve {nombre: (funcion_escalar, funcion_lote)}; cada función recibe (f_GHz, d_km)."""
+    p1411, weissberger, free_space = calculadora.p1411, calculadora.weissberger, calculadora.free_space
+    codigo_p1411 = p1411.codigo("urban")
+    codigo_weissberger = weissberger.codigo("forest")
+
+    def escalar(funcion):
+        def recorrer(f_GHz, d_km):
+            for f, d in zip(f_GHz.tolist(), d_km.tolist()):
+                funcion(f, d)
+        return recorrer
+
+    casos = {
+        "p1411": (escalar(lambda f, d: p1411.calcular(f, d, "urban")),
+                  lambda f, d: p1411.calcular(f, d, np.full(len(f), codigo_p1411))),
+        "weissberger": (escalar(lambda f, d: weissberger.calcular(f, d, "forest")),
+                        lambda f, d: weissberger.calcular(f, d, np.full(len(f), codigo_weissberger))),
+        "free_space": (escalar(free_space.calcular), free_space.calcular),
+    }
+    for opcion in (1, 7, 11, 14, 15, 16, 17):
+        casos[f"controlador_{opcion}"] = (
+            escalar(lambda f, d, o=opcion: calculadora.calcular(f, d, o)),
+            lambda f, d, o=opcion: calculadora.calcular_lote(f, d, o),
+        )
+    casos["controlador_mezcla"] = (
+        escalar(lambda f, d: calculadora.calcular(f, d, 1 + int(d * 1000) % 17)),
+        lambda f, d: calculadora.calcular_lote(f, d, 1 + (d * 1000).astype(int) % 17),
+    )
+    return casos
+
+def _medir(funcion, f_GHz, d_km, tiempo_minimo):
+    """Mejor tiempo de varias repeticiones (al menos 3 o hasta acumular `tiempo_minimo` s)."""
+    mejor, acumulado, repeticiones = float("inf"), 0.0, 0
+    while repeticiones < 3 or acumulado < tiempo_minimo:
+        inicio = time.perf_counter()
+        funcion(f_GHz, d_km)
+        transcurrido = time.perf_counter() - inicio
+        mejor = min(mejor, transcurrido)
+        acumulado += transcurrido
+        repeticiones += 1
+        if transcurrido > tiempo_minimo:
+            break
+    return mejor, repeticiones
+
+def _memoria_pico(funcion, f_GHz, d_km):
+    tracemalloc.start()
+    try:
+        funcion(f_GHz, d_km)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def ejecutar_benchmark(tamanos=TAMANOS_POR_DEFECTO, max_escalar=100_000, tiempo_minimo=0.2, casos=None):
+    """Mide ns/punto y memoria pico de cada modelo, en modo escalar y por lotes."""
+    calculadora = Controlador()
+    todos = _casos(calculadora)
+    desconocidos = set(casos or ()) - set(todos)
+    if desconocidos:
+        raise ValueError(f"Casos no válidos: {sorted(desconocidos)}. Opciones: {list(todos)}")
+    seleccion = {nombre: todos[nombre] for nombre in (casos or todos)}
+    resultados = []
+
+    for n in tamanos:
+        f_GHz, d_km = _entradas(n)
+        for nombre, (funcion_escalar, funcion_lote) in seleccion.items():
+            for modo, funcion in (("escalar", funcion_escalar), ("lote", funcion_lote)):
+                if modo == "escalar" and n > max_escalar:
+                    continue
+                segundos, repeticiones = _medir(funcion, f_GHz, d_km, tiempo_minimo)
+                resultado = {
+                    "caso": nombre,
+                    "modo": modo,
+                    "n": n,
+                    "ns_por_punto": segundos * 1e9 / n,
+                    "repeticiones": repeticiones,
+                    "memoria_pico_bytes": _memoria_pico(funcion, f_GHz, d_km),
+                }
+                resultados.append(resultado)
+                print(f"{nombre:<20} {modo:<8} n={n:<10} {resultado['ns_por_punto']:>12.1f} ns/punto "
+                      f"{resultado['memoria_pico_bytes'] / 2**20:>10.2f} MiB")
+
+    return {
+        "metadatos": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+        },
+        "resultados": resultados,
+    }
+
+def comparar_con_base(actual, base, tolerancia=0.2):
+    """Devuelve las mediciones cuyo ns/punto empeora más de `tolerancia` respecto a la base."""
+    referencia = {(r["caso"], r["modo"], r["n"]): r for r in base["resultados"]}
+    regresiones = []
+    for r in actual["resultados"]:
+        anterior = referencia.get((r["caso"], r["modo"], r["n"]))
+        if anterior is None:
+            continue
+        cambio = r["ns_por_punto"] / anterior["ns_por_punto"] - 1
+        if cambio > tolerancia:
+            regresiones.append({**r, "ns_por_punto_base": anterior["ns_por_punto"], "cambio": cambio})
+    return regresiones
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmark de los modelos de propagacion empiricos")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS_POR_DEFECTO),
+                        help="Cantidades de puntos a medir")
+    parser.add_argument("--casos", nargs="+", help="Casos a medir (por defecto, todos)")
+    parser.add_argument("--max-escalar", type=int, default=100_000,
+                        help="Tamano maximo medido en modo escalar (bucle de Python)")
+    parser.add_argument("--salida", default="benchmark.json", help="Archivo JSON de resultados")
+    parser.add_argument("--base", help="JSON de una ejecucion anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Empeoramiento relativo permitido antes de marcar una regresion")
+    args = parser.parse_args(argumentos)
+
+    actual = ejecutar_benchmark(args.tamanos, args.max_escalar, casos=args.casos)
+    with open(args.salida, "w") as f:
+        json.dump(actual, f, indent=2)
+    print(f"\nResultados guardados en '{args.salida}'")
+
+    if args.base:
+        with open(args.base) as f:
+            base = json.load(f)
+        regresiones = comparar_con_base(actual, base, args.tolerancia)
+        for r in regresiones:
+            print(f"REGRESION {r['caso']} {r['modo']} n={r['n']}: "
+                  f"{r['ns_por_punto_base']:.1f} -> {r['ns_por_punto']:.1f} ns/punto ({r['cambio']:+.0%})")
+        if regresiones:
+            return 1
+        print("Sin regresiones respecto a la base")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
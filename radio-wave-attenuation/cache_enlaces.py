@@ -0,0 +1,132 @@
+import json
+import pickle
+from collections import OrderedDict
+from controlador import Controlador
+
+class CacheEnlaces:
+    """Memoización LRU delante de `Controlador.calcular` y `calcular_modelo`.
+
+    Frecuencia y distancia se cuantizan con `paso_f_GHz` y `paso_d_km` (None
+    desactiva la cuantización de ese eje) y el cálculo se hace con los valores
+    cuantizados, de modo que el resultado guardado corresponde exactamente a
+    su clave. Los valores menores que un paso no se cuantizan: redondeados
+    darían 0 y log10(0) = -inf. Los resultados se comparten entre consultas: no deben
+    modificarse. Cualquier otro atributo se delega en el controlador.
+    """
+
+    def __init__(self, calculadora=None, capacidad=100_000, paso_f_GHz=None, paso_d_km=0.01):
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1")
+        self.calculadora = calculadora or Controlador()
+        self.capacidad = capacidad
+        self.paso_f_GHz = paso_f_GHz
+        self.paso_d_km = paso_d_km
+        self._entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def __getattr__(self, nombre):
+        if nombre == "calculadora":
+            raise AttributeError(nombre)
+        return getattr(self.calculadora, nombre)
+
+    @staticmethod
+    def _cuantizar_eje(valor, paso):
+        """(clave, valor): múltiplo entero del paso, o el valor exacto si no hay paso o es menor que uno.
+
+        Las claves cuantizadas son enteros >= 1, así que no chocan con las
+        exactas (menores que un paso).
+        """
+        if paso is None or valor < paso:
+            return valor, valor
+        clave = round(valor / paso)
+        return clave, clave * paso
+
+    def _cuantizar(self, f_GHz, d_km):
+        """Devuelve (clave_f, clave_d, f_GHz, d_km) con los valores cuantizados."""
+        clave_f, f_GHz = self._cuantizar_eje(f_GHz, self.paso_f_GHz)
+        clave_d, d_km = self._cuantizar_eje(d_km, self.paso_d_km)
+        return clave_f, clave_d, f_GHz, d_km
+
+    def _guardar(self, clave, resultado):
+        self._entradas[clave] = resultado
+        if len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+            self.desalojos += 1
+
+    def calcular(self, f_GHz, d_km, opcion_clutter):
+        """Igual que `Controlador.calcular`, con las entradas cuantizadas y memoizadas."""
+        clave_f, clave_d, f_GHz, d_km = self._cuantizar(f_GHz, d_km)
+        clave = ("calcular", clave_f, clave_d, opcion_clutter)
+        resultado = self._entradas.get(clave)
+        if resultado is not None:
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return resultado
+        self.fallos += 1
+        resultado = self.calculadora.calcular(f_GHz, d_km, opcion_clutter)
+        self._guardar(clave, resultado)
+        return resultado
+
+    def calcular_modelo(self, f_GHz, d_km, modelo, tipo):
+        """Igual que `Controlador.calcular_modelo`, con las entradas cuantizadas y memoizadas."""
+        clave_f, clave_d, f_GHz, d_km = self._cuantizar(f_GHz, d_km)
+        clave = ("modelo", clave_f, clave_d, modelo, tipo)
+        resultado = self._entradas.get(clave)
+        if resultado is not None:
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return resultado
+        self.fallos += 1
+        resultado = self.calculadora.calcular_modelo(f_GHz, d_km, modelo, tipo)
+        self._guardar(clave, resultado)
+        return resultado
+
+    def precalentar(self, combinaciones):
+        """Calcula y guarda una secuencia de (f_GHz, d_km, opcion_clutter) sin contar fallos."""
+        for f_GHz, d_km, opcion_clutter in combinaciones:
+            clave_f, clave_d, f_GHz, d_km = self._cuantizar(f_GHz, d_km)
+            clave = ("calcular", clave_f, clave_d, opcion_clutter)
+            if clave not in self._entradas:
+                self._guardar(clave, self.calculadora.calcular(f_GHz, d_km, opcion_clutter))
+
+    def guardar_tabla(self, ruta):
+        """Guarda las entradas actuales para precalentar otra instancia al arrancar."""
+        with open(ruta, "wb") as f:
+            pickle.dump({
+                "paso_f_GHz": self.paso_f_GHz,
+                "paso_d_km": self.paso_d_km,
+                "entradas": list(self._entradas.items()),
+            }, f)
+
+    def precalentar_desde_tabla(self, ruta):
+        """Carga una tabla guardada con `guardar_tabla` (archivo local de confianza: usa pickle)."""
+        with open(ruta, "rb") as f:
+            tabla = pickle.load(f)
+        if (tabla["paso_f_GHz"], tabla["paso_d_km"]) != (self.paso_f_GHz, self.paso_d_km):
+            raise ValueError("La tabla se generó con otra cuantización de frecuencia/distancia")
+        for clave, resultado in tabla["entradas"]:
+            self._guardar(clave, resultado)
+
+    def limpiar(self):
+        """Vacía la caché y reinicia los contadores."""
+        self._entradas.clear()
+        self.aciertos = self.fallos = self.desalojos = 0
+
+    def estadisticas(self):
+        """Contadores de aciertos, fallos y desalojos, y ocupación actual."""
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "desalojos": self.desalojos,
+            "tamano": len(self._entradas),
+            "capacidad": self.capacidad,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+    def exportar_estadisticas(self, ruta):
+        """Escribe las estadísticas en un archivo JSON."""
+        with open(ruta, "w") as f:
+            json.dump(self.estadisticas(), f, indent=2)
@@ -3,6 +3,24 @@ from weissberger import Weissberger
 from free_space import FreeSpace
 import numpy as np
 
+def indices_opciones(opcion_clutter, validas):
+    """Opciones de clutter como arreglo de índices enteros (np.intp), validadas contra la tabla `validas`.
+
+    Lanza ValueError si alguna opción no es un número (texto, booleanos), no
+    es entera (1.5, NaN, inf) o no está marcada en `validas`: nunca se trunca.
+    """
+    opcion_clutter = np.asarray(opcion_clutter)
+    if opcion_clutter.dtype.kind not in "iuf":
+        raise ValueError("Opción de clutter no válida")
+    if opcion_clutter.dtype.kind == "f" and not np.all(
+        np.isfinite(opcion_clutter) & (opcion_clutter == np.round(opcion_clutter))
+    ):
+        raise ValueError("Opción de clutter no válida")
+    indices = opcion_clutter.astype(np.intp, copy=False)
+    if indices.size and (indices.min() < 0 or indices.max() >= len(validas) or not validas[indices].all()):
+        raise ValueError("Opción de clutter no válida")
+    return indices
+
 class Controlador:
     def __init__(self):
         self.p1411 = P1411()
@@ -48,6 +66,36 @@ class Controlador:
                      {"modelo": "weissberger", "tipo": "sparse_forest"}
                  ]}
         }
+        self.compilar_opciones()
+
+    def compilar_opciones(self):
+        """Construye tablas indexadas por opción de clutter con los códigos enteros de cada modelo.
+
+        Un código -1 (o un ajuste NaN) indica que el modelo no participa en la opción.
+        """
+        n = max(self.clutters) + 1
+        self.opcion_valida = np.zeros(n, dtype=bool)
+        self.opcion_p1411 = np.full(n, -1, dtype=np.intp)
+        self.opcion_weissberger = np.full(n, -1, dtype=np.intp)
+        self.opcion_ajuste = np.full(n, np.nan)
+        self.opcion_combo = np.zeros(n, dtype=bool)
+        self.opcion_n_componentes = np.ones(n)
+
+        for opcion, clutter in self.clutters.items():
+            self.opcion_valida[opcion] = True
+            if clutter["modelo"] == "combo":
+                componentes = clutter["componentes"]
+                self.opcion_combo[opcion] = True
+                self.opcion_n_componentes[opcion] = len(componentes)
+            else:
+                componentes = [clutter]
+            for componente in componentes:
+                if componente["modelo"] == "p1411":
+                    self.opcion_p1411[opcion] = self.p1411.codigo(componente["tipo"])
+                elif componente["modelo"] == "weissberger":
+                    self.opcion_weissberger[opcion] = self.weissberger.codigo(componente["tipo"])
+                elif componente["modelo"] == "free_space":
+                    self.opcion_ajuste[opcion] = self.free_space.aplicar_ajuste(componente["tipo"])
 
     def calcular_modelo(self, f_GHz, d_km, modelo, tipo):
         """Calcula pérdidas para un modelo específico"""
@@ -115,3 +163,59 @@ class Controlador:
                 resultados["total"] += L_clutter - L_free
 
         return resultados
+
+    def calcular_lote(self, f_GHz, d_km, opcion_clutter):
+        """Calcula pérdidas para arreglos de frecuencias, distancias y opciones de clutter.
+
+        Las tres entradas se difunden (broadcasting de NumPy) a una forma común.
+        Cada modelo se evalúa una sola vez sobre los elementos que lo usan, con
+        sus coeficientes reunidos por código entero. Los resultados coinciden
+        con los de `calcular`, salvo el redondeo de la potencia vectorizada de
+        NumPy (~1e-15 relativo). Las opciones de clutter se validan con
+        `indices_opciones`.
+        Devuelve un diccionario de arreglos: "free_space", "p1411",
+        "weissberger" y "ajuste" (NaN donde el componente no aplica),
+        "adicionales" (pérdida de clutter sumada al espacio libre) y "total".
+        """
+        f_GHz, d_km, opcion_clutter = np.broadcast_arrays(
+            np.asarray(f_GHz, dtype=float),
+            np.asarray(d_km, dtype=float),
+            np.asarray(opcion_clutter),
+        )
+        forma = f_GHz.shape
+        f_GHz = f_GHz.ravel()
+        d_km = d_km.ravel()
+        opcion_clutter = indices_opciones(opcion_clutter.ravel(), self.opcion_valida)
+
+        L_free = self.free_space.calcular(f_GHz, d_km)
+        resultados = {
+            "free_space": L_free,
+            "p1411": np.full(L_free.shape, np.nan),
+            "weissberger": np.full(L_free.shape, np.nan),
+            "ajuste": self.opcion_ajuste[opcion_clutter],
+        }
+        suma_componentes = np.zeros(L_free.shape)
+
+        # Cada modelo se evalúa una sola vez, reuniendo sus coeficientes por código
+        for modelo, tabla in (("p1411", self.opcion_p1411), ("weissberger", self.opcion_weissberger)):
+            codigos = tabla[opcion_clutter]
+            mascara = codigos >= 0
+            if not mascara.any():
+                continue
+            L_f = L_free[mascara]
+            perdidas = self.calcular_modelo(f_GHz[mascara], d_km[mascara], modelo, codigos[mascara]) - L_f
+            resultados[modelo][mascara] = perdidas
+            suma_componentes[mascara] += perdidas
+
+        mascara = ~np.isnan(resultados["ajuste"])
+        if mascara.any():
+            ajuste = resultados["ajuste"][mascara]
+            L_f = L_free[mascara]
+            # En los combos el componente se calcula como en calcular_modelo
+            perdidas = np.where(self.opcion_combo[opcion_clutter[mascara]], (L_f + ajuste) - L_f, ajuste)
+            suma_componentes[mascara] += perdidas
+
+        resultados["adicionales"] = suma_componentes / self.opcion_n_componentes[opcion_clutter]
+        resultados["total"] = L_free + resultados["adicionales"]
+
+        return {clave: valor.reshape(forma) for clave, valor in resultados.items()}
@@ -0,0 +1,128 @@
+import os
+import numpy as np
+from controlador import indices_opciones
+
+class CuboPerdidas:
+    """Cubo de pérdidas totales (dB) con ejes frecuencia x distancia x entorno.
+
+    Se genera en bloques de frecuencias con `Controlador.calcular_lote` y se
+    guarda en un directorio con `perdidas.npy` (mapeable en memoria) y
+    `ejes.npz`, que se escribe al final: un cubo cuya generación se
+    interrumpió no se puede cargar. Las consultas interpolan bilinealmente
+    en log10(f) y log10(d), donde P.1411 y espacio libre son lineales; si los
+    ejes son logarítmicamente uniformes (np.geomspace) el índice se obtiene
+    en O(1), sin búsqueda.
+    """
+
+    ARCHIVO_DATOS = "perdidas.npy"
+    ARCHIVO_EJES = "ejes.npz"
+
+    def __init__(self, frecuencias, distancias, entornos, datos):
+        self.frecuencias = np.asarray(frecuencias, dtype=float)
+        self.distancias = np.asarray(distancias, dtype=float)
+        self.entornos = np.asarray(entornos, dtype=int)
+        self.datos = datos
+
+        self._eje_f = self._preparar_eje(self.frecuencias)
+        self._eje_d = self._preparar_eje(self.distancias)
+        self._indice_entorno = np.full(self.entornos.max() + 1, -1, dtype=np.intp)
+        self._indice_entorno[self.entornos] = np.arange(len(self.entornos))
+
+    @staticmethod
+    def _preparar_eje(valores):
+        if valores.ndim != 1 or len(valores) < 2 or np.any(np.diff(valores) <= 0):
+            raise ValueError("Los ejes deben tener al menos dos valores positivos y crecientes")
+        log_valores = np.log10(valores)
+        paso = np.diff(log_valores)
+        uniforme = np.allclose(paso, paso[0], rtol=1e-9, atol=0)
+        return log_valores, (paso[0] if uniforme else None)
+
+    @classmethod
+    def generar(cls, calculadora, frecuencias, distancias, entornos=range(1, 18),
+                ruta=None, dtype=np.float32, max_elementos_bloque=2**22):
+        """Calcula el cubo completo; si se indica `ruta`, lo escribe en disco por bloques."""
+        frecuencias = np.asarray(frecuencias, dtype=float)
+        distancias = np.asarray(distancias, dtype=float)
+        entornos = np.asarray(list(entornos), dtype=int)
+        forma = (len(frecuencias), len(distancias), len(entornos))
+
+        if ruta is None:
+            datos = np.empty(forma, dtype=dtype)
+        else:
+            os.makedirs(ruta, exist_ok=True)
+            # Sin ejes el directorio no se puede cargar mientras se reescriben los datos
+            ruta_ejes = os.path.join(ruta, cls.ARCHIVO_EJES)
+            if os.path.exists(ruta_ejes):
+                os.remove(ruta_ejes)
+            datos = np.lib.format.open_memmap(
+                os.path.join(ruta, cls.ARCHIVO_DATOS), mode="w+", dtype=dtype, shape=forma
+            )
+
+        # Cada bloque abarca varias frecuencias completas (todas las distancias y entornos)
+        por_bloque = max(1, max_elementos_bloque // (forma[1] * forma[2]))
+        for inicio in range(0, forma[0], por_bloque):
+            f = frecuencias[inicio:inicio + por_bloque, None, None]
+            resultado = calculadora.calcular_lote(f, distancias[None, :, None], entornos[None, None, :])
+            datos[inicio:inicio + por_bloque] = resultado["total"]
+
+        if ruta is not None:
+            datos.flush()
+            temporal = f"{ruta_ejes}.{os.getpid()}.tmp"
+            with open(temporal, "wb") as f:
+                np.savez(f, frecuencias=frecuencias, distancias=distancias, entornos=entornos)
+            os.replace(temporal, ruta_ejes)
+        return cls(frecuencias, distancias, entornos, datos)
+
+    @classmethod
+    def cargar(cls, ruta, mmap=True):
+        """Carga un cubo guardado; con `mmap` los datos se leen bajo demanda."""
+        with np.load(os.path.join(ruta, cls.ARCHIVO_EJES)) as ejes:
+            frecuencias = ejes["frecuencias"]
+            distancias = ejes["distancias"]
+            entornos = ejes["entornos"]
+        datos = np.load(os.path.join(ruta, cls.ARCHIVO_DATOS), mmap_mode="r" if mmap else None)
+        return cls(frecuencias, distancias, entornos, datos)
+
+    @staticmethod
+    def _ubicar(eje, valores):
+        """Devuelve índice inferior, peso de interpolación y máscara de validez sobre un eje."""
+        log_eje, paso = eje
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = np.log10(valores)
+        if paso is not None:
+            posicion = (x - log_eje[0]) / paso
+            indice = np.floor(posicion)
+        else:
+            indice = np.searchsorted(log_eje, x, side="right") - 1.0
+            posicion = None
+        validos = (x >= log_eje[0]) & (x <= log_eje[-1])
+        indice = np.clip(np.nan_to_num(indice), 0, len(log_eje) - 2).astype(np.intp)
+        if posicion is None:
+            peso = (x - log_eje[indice]) / (log_eje[indice + 1] - log_eje[indice])
+        else:
+            peso = posicion - indice
+        return indice, np.clip(np.nan_to_num(peso), 0.0, 1.0), validos
+
+    def consultar(self, f_GHz, d_km, opcion_clutter):
+        """Interpola las pérdidas totales para arreglos de frecuencia, distancia y opción.
+
+        Devuelve NaN fuera del rango de los ejes. Las opciones se validan como
+        en `Controlador.calcular_lote` (`indices_opciones`): ValueError si
+        alguna no es entera o no es un entorno del cubo.
+        """
+        opcion = indices_opciones(opcion_clutter, self._indice_entorno >= 0)
+        f_GHz, d_km, opcion = np.broadcast_arrays(np.asarray(f_GHz, dtype=float), np.asarray(d_km, dtype=float), opcion)
+        i, wi, validos_f = self._ubicar(self._eje_f, f_GHz)
+        j, wj, validos_d = self._ubicar(self._eje_d, d_km)
+
+        k = self._indice_entorno[opcion]
+        validos = validos_f & validos_d
+
+        datos = self.datos
+        perdidas = (
+            (1 - wi) * (1 - wj) * datos[i, j, k]
+            + (1 - wi) * wj * datos[i, j + 1, k]
+            + wi * (1 - wj) * datos[i + 1, j, k]
+            + wi * wj * datos[i + 1, j + 1, k]
+        )
+        return np.where(validos, perdidas, np.nan)
@@ -1,5 +1,7 @@
 from controlador import Controlador
 from datetime import datetime
+import numpy as np
+# cubo_perdidas, procesamiento_lote y argparse se importan en las funciones que los usan
 
 def mostrar_menu_principal():
     print("\nMODELOS DE PROPAGACION - MENU PRINCIPAL")
@@ -31,6 +33,7 @@ def mostrar_menu_principal():
     print("17. Humedal")
 
     print("\n18. Ver tabla con perdidas para todos los entornos")
+    print("19. Generar cubo de perdidas (frecuencia x distancia x entorno)")
     print(" 0. Salir")
 
 def mostrar_resultados(resultado):
@@ -64,24 +67,16 @@ def mostrar_tabla_perdidas(calculadora, f_GHz, d_km):
 
     tabla_lineas = []
 
-    for i in range(1, 18):
-        resultado = calculadora.calcular(f_GHz, d_km, i)
-        nombre = resultado["nombre"]
+    entornos = np.arange(1, 18)
+    resultados = calculadora.calcular_lote(f_GHz, d_km, entornos)
 
-        if "ajuste" in resultado:
-            adicionales = resultado["ajuste"]
-        else:
-            # Si hay más de un componente, es un entorno combinado
-            componentes = resultado["componentes"]
-            adicionales = sum(comp["perdidas"] for comp in componentes)
-            if len(componentes) > 1:
-                adicionales /= len(componentes)
-
-        total = resultado["total"]
+    for i, opcion in enumerate(entornos):
+        nombre = calculadora.clutters[opcion]["nombre"]
+        adicionales = resultados["adicionales"][i]
+        total = resultados["total"][i]
         print(f"{nombre:<30} {adicionales:>20.2f} {total:>20.2f}")
         tabla_lineas.append((nombre, adicionales, total))
 
-
     return tabla_lineas, free_space
 
 def guardar_tabla_en_txt(tabla_lineas, f_GHz, d_km, free_space):
@@ -100,6 +95,35 @@ def guardar_tabla_en_txt(tabla_lineas, f_GHz, d_km, free_space):
     except Exception as e:
         print(f"Error al guardar: {str(e)}")
 
+def generar_cubo_perdidas(calculadora):
+    print("\nGENERACION DE CUBO DE PERDIDAS")
+    print("-" * 50)
+    try:
+        f_min = float(input("   Frecuencia minima (GHz): "))
+        f_max = float(input("   Frecuencia maxima (GHz): "))
+        n_f = int(input("   Numero de frecuencias: "))
+        d_min = float(input("   Distancia minima (km): "))
+        d_max = float(input("   Distancia maxima (km): "))
+        n_d = int(input("   Numero de distancias: "))
+    except ValueError:
+        print("Error: Ingrese valores numericos validos")
+        return
+
+    if min(f_min, d_min) <= 0 or f_max <= f_min or d_max <= d_min or min(n_f, n_d) < 2:
+        print("Error: Rangos no validos")
+        return
+
+    from cubo_perdidas import CuboPerdidas
+    ruta = input("   Directorio de salida: ").strip() or "cubo_perdidas"
+    # Ejes logaritmicos: permiten consultas interpoladas en O(1)
+    frecuencias = np.geomspace(f_min, f_max, n_f)
+    distancias = np.geomspace(d_min, d_max, n_d)
+    try:
+        cubo = CuboPerdidas.generar(calculadora, frecuencias, distancias, ruta=ruta)
+        print(f"\nCubo de {cubo.datos.shape} guardado en '{ruta}'")
+    except Exception as e:
+        print(f"Error al generar el cubo: {str(e)}")
+
 def main():
     print("Sistema de calculo de perdidas por propagacion")
     print("---------------------------------------------")
@@ -108,17 +132,21 @@ def main():
     while True:
         mostrar_menu_principal()
         try:
-            opcion = input("\nSeleccione una opcion (0-18): ").strip()
+            opcion = input("\nSeleccione una opcion (0-19): ").strip()
             
             if opcion == '0':
                 print("\nFin del programa")
                 break
                 
-            if not opcion.isdigit() or int(opcion) not in range(0, 19):
-                print("Error: Ingrese un numero entre 0 y 18")
+            if not opcion.isdigit() or int(opcion) not in range(0, 20):
+                print("Error: Ingrese un numero entre 0 y 19")
                 continue
                 
             opcion = int(opcion)
+
+            if opcion == 19:
+                generar_cubo_perdidas(calculadora)
+                continue
             
             print("\nParametros de simulacion:")
             try:
@@ -160,5 +188,26 @@ def main():
             print(f"Error inesperado: {str(e)}")
             print("Intente nuevamente")
 
+def main_lote(argumentos=None):
+    import argparse
+    from procesamiento_lote import procesar_lote
+    parser = argparse.ArgumentParser(
+        description="Calculo de perdidas por lotes a partir de un CSV/JSONL de enlaces "
+                    "(columnas f_GHz, d_km, opcion_clutter)"
+    )
+    parser.add_argument("--lote", required=True, help="Archivo de entrada (.csv o .jsonl)")
+    parser.add_argument("--salida", required=True, help="Archivo de resultados (.csv o .jsonl)")
+    parser.add_argument("--tam-bloque", type=int, default=100_000, help="Filas procesadas por bloque")
+    args = parser.parse_args(argumentos)
+
+    filas, segundos = procesar_lote(Controlador(), args.lote, args.salida, args.tam_bloque)
+    velocidad = filas / segundos if segundos > 0 else float("inf")
+    print(f"{filas} filas procesadas en {segundos:.2f} s ({velocidad:,.0f} filas/s)")
+    print(f"Resultados guardados en '{args.salida}'")
+
 if __name__ == "__main__":
-    main()
+    import sys
+    if len(sys.argv) > 1:
+        main_lote()
+    else:
+        main()
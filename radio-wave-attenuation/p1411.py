@@ -12,9 +12,34 @@ class P1411:
             "high_buildings": {"alpha": 4.39, "beta": -6.27, "gamma": 2.30, "sigma": 6.89},
             "building_blocks": {"alpha": 2.29, "beta": 28.6, "gamma": 1.96, "sigma": 3.48},
         }
+        self.compilar_coeficientes()
+
+    def compilar_coeficientes(self):
+        """Construye arreglos contiguos de coeficientes indexados por código entero de entorno."""
+        self.entornos = list(self.coeficientes.keys())
+        self.codigos = {entorno: i for i, entorno in enumerate(self.entornos)}
+        self.alpha = np.array([self.coeficientes[e]["alpha"] for e in self.entornos])
+        self.beta = np.array([self.coeficientes[e]["beta"] for e in self.entornos])
+        self.gamma = np.array([self.coeficientes[e]["gamma"] for e in self.entornos])
+        self.sigma = np.array([self.coeficientes[e]["sigma"] for e in self.entornos])
+
+    def codigo(self, entorno):
+        """Devuelve el código entero de un entorno."""
+        codigo = self.codigos.get(entorno.lower())
+        if codigo is None:
+            raise ValueError(f"Entorno no válido. Opciones: {self.entornos}")
+        return codigo
 
     def calcular(self, f_GHz, distancia_km, entorno):
-        coef = self.coeficientes.get(entorno.lower())
-        if not coef:
-            raise ValueError(f"Entorno no válido. Opciones: {list(self.coeficientes.keys())}")
-        return 10 * coef["alpha"] * np.log10(distancia_km * 1000) + coef["beta"] + 10 * coef["gamma"] * np.log10(f_GHz)
\ No newline at end of file
+        """Pérdidas P.1411; `entorno` puede ser un nombre o un arreglo de códigos enteros."""
+        if isinstance(entorno, str):
+            coef = self.coeficientes.get(entorno.lower())
+            if not coef:
+                raise ValueError(f"Entorno no válido. Opciones: {list(self.coeficientes.keys())}")
+            alpha, beta, gamma = coef["alpha"], coef["beta"], coef["gamma"]
+        else:
+            codigos = np.asarray(entorno)
+            if codigos.size and (codigos.min() < 0 or codigos.max() >= len(self.entornos)):
+                raise ValueError(f"Código de entorno no válido. Rango: 0-{len(self.entornos) - 1}")
+            alpha, beta, gamma = self.alpha[codigos], self.beta[codigos], self.gamma[codigos]
+        return 10 * alpha * np.log10(distancia_km * 1000) + beta + 10 * gamma * np.log10(f_GHz)
\ No newline at end of file
@@ -0,0 +1,141 @@
+import csv
+import json
+import time
+from itertools import islice
+from operator import itemgetter
+import numpy as np
+
+COLUMNAS_ENTRADA = ("f_GHz", "d_km", "opcion_clutter")
+COLUMNAS_SALIDA = COLUMNAS_ENTRADA + ("free_space", "adicionales", "total")
+FORMATO_FILA_CSV = "%.10g,%.10g,%d,%.4f,%.4f,%.4f\n"
+# Formato de cada columna para las filas incompletas (los valores faltantes quedan vacíos); la opción
+# de clutter usa %.10g porque puede ser el valor no válido de la entrada (p. ej. 1.5)
+FORMATOS_CSV = ("%.10g",) * len(COLUMNAS_ENTRADA) + ("%.4f",) * (len(COLUMNAS_SALIDA) - len(COLUMNAS_ENTRADA))
+
+def _leer_filas(archivo, formato):
+    """Genera tuplas (f_GHz, d_km, opcion_clutter) como texto o números, sin cargar el archivo.
+
+    Las columnas que falten en una fila (claves ausentes en JSONL, filas CSV
+    truncadas) se entregan como None, y también todas las de una línea JSONL
+    que no sea un objeto JSON válido.
+    """
+    if formato == "jsonl":
+        for linea in archivo:
+            if linea.strip():
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    registro = None
+                if isinstance(registro, dict):
+                    yield tuple(registro.get(c) for c in COLUMNAS_ENTRADA)
+                else:
+                    yield (None,) * len(COLUMNAS_ENTRADA)
+    else:
+        lector = csv.reader(archivo)
+        encabezado = next(lector, None)
+        try:
+            indices = [[c.strip() for c in encabezado].index(c) for c in COLUMNAS_ENTRADA]
+        except (TypeError, ValueError):
+            raise ValueError(f"El CSV debe tener las columnas: {', '.join(COLUMNAS_ENTRADA)}")
+        columnas = itemgetter(*indices)
+        ancho = max(indices) + 1
+        for fila in lector:
+            if fila:
+                if len(fila) < ancho:
+                    fila = fila + [None] * (ancho - len(fila))
+                yield columnas(fila)
+
+def _numero(valor):
+    """Valor de entrada como float; NaN si falta o no es un número."""
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _convertir_bloque(bloque):
+    """Bloque de filas como arreglo (n, 3) de floats, con NaN en los valores no numéricos."""
+    try:
+        return np.array(bloque, dtype=float)
+    except (TypeError, ValueError):
+        # Alguna fila tiene campos vacíos o no numéricos: se convierte fila por fila
+        return np.array([[_numero(valor) for valor in fila] for fila in bloque], dtype=float).reshape(-1, 3)
+
+def _campo_csv(formato, valor):
+    """Campo de una fila incompleta: vacío si falta, el número con su formato o el texto de entrada tal cual."""
+    if valor is None or valor != valor:
+        return ""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return formato % valor
+    texto = str(valor)
+    if any(caracter in texto for caracter in ',"\r\n'):
+        texto = '"' + texto.replace('"', '""') + '"'
+    return texto
+
+def _fila_csv_incompleta(valores):
+    return ",".join(_campo_csv(formato, valor) for formato, valor in zip(FORMATOS_CSV, valores)) + "\n"
+
+def _formato(ruta):
+    return "jsonl" if ruta.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+def procesar_lote(calculadora, ruta_entrada, ruta_salida, tam_bloque=100_000):
+    """Calcula pérdidas para un archivo CSV/JSONL de enlaces, bloque a bloque.
+
+    Cada bloque se convierte a arreglos, se evalúa con `calcular_lote` y se
+    escribe de inmediato, así la memoria depende de `tam_bloque` y no del
+    tamaño del archivo. Las filas con opción de clutter no válida, valores
+    no positivos, vacíos o no numéricos se escriben con pérdidas vacías (CSV)
+    o null (JSONL); los valores de entrada que no son números (o la opción,
+    si no es válida) se escriben tal como venían.
+    Devuelve (filas, segundos).
+    """
+    formato_entrada = _formato(ruta_entrada)
+    formato_salida = _formato(ruta_salida)
+    opciones_validas = np.fromiter(calculadora.clutters.keys(), dtype=int)
+    filas = 0
+    inicio = time.perf_counter()
+
+    with open(ruta_entrada, newline="") as entrada, open(ruta_salida, "w", newline="") as salida:
+        if formato_salida == "csv":
+            salida.write(",".join(COLUMNAS_SALIDA) + "\n")
+        filas_entrada = _leer_filas(entrada, formato_entrada)
+
+        while True:
+            bloque = list(islice(filas_entrada, tam_bloque))
+            if not bloque:
+                break
+            datos = _convertir_bloque(bloque)
+            f_GHz, d_km, opcion = datos[:, 0], datos[:, 1], datos[:, 2]
+
+            opcion_valida = np.isin(opcion, opciones_validas)
+            validos = (f_GHz > 0) & (d_km > 0) & opcion_valida
+            resultados = {c: np.full(len(bloque), np.nan) for c in COLUMNAS_SALIDA[3:]}
+            if validos.any():
+                lote = calculadora.calcular_lote(f_GHz[validos], d_km[validos], opcion[validos].astype(int))
+                for c in resultados:
+                    resultados[c][validos] = lote[c]
+
+            # Entradas como número si lo son; si no, el valor original de la fila
+            entradas = [
+                (f if f == f else crudo[0], d if d == d else crudo[1], int(o) if ok else crudo[2])
+                for f, d, o, ok, crudo in zip(f_GHz.tolist(), d_km.tolist(), opcion.tolist(), opcion_valida.tolist(), bloque)
+            ]
+            filas_salida = (
+                entrada + resto
+                for entrada, resto in zip(entradas, zip(*(resultados[c].tolist() for c in COLUMNAS_SALIDA[3:])))
+            )
+            if formato_salida == "jsonl":
+                salida.writelines(
+                    json.dumps({c: (None if isinstance(v, float) and np.isnan(v) else v)
+                                for c, v in zip(COLUMNAS_SALIDA, valores)}) + "\n"
+                    for valores in filas_salida
+                )
+            else:
+                # Una sola escritura por bloque; las filas con valores faltantes dejan esos campos vacíos
+                completas = validos & np.isfinite(resultados["total"])
+                salida.write("".join(
+                    FORMATO_FILA_CSV % valores if completa else _fila_csv_incompleta(valores)
+                    for valores, completa in zip(filas_salida, completas.tolist())
+                ))
+            filas += len(bloque)
+
+    return filas, time.perf_counter() - inicio
@@ -8,9 +8,30 @@ class Weissberger:
             "low_vegetation": 0.25,
             "barren": 0.1,
         }
+        self.compilar_coeficientes()
+
+    def compilar_coeficientes(self):
+        """Construye el arreglo contiguo de df indexado por código entero de vegetación."""
+        self.tipos = list(self.df_values.keys())
+        self.codigos = {tipo: i for i, tipo in enumerate(self.tipos)}
+        self.df = np.array([self.df_values[t] for t in self.tipos])
+
+    def codigo(self, tipo_vegetacion):
+        """Devuelve el código entero de un tipo de vegetación."""
+        codigo = self.codigos.get(tipo_vegetacion.lower())
+        if codigo is None:
+            raise ValueError(f"Tipo de vegetación no válido. Opciones: {self.tipos}")
+        return codigo
 
     def calcular(self, f_GHz, d_km, tipo_vegetacion):
-        df = self.df_values.get(tipo_vegetacion.lower(), 0.0)
+        """Pérdidas de Weissberger; `tipo_vegetacion` puede ser un nombre o un arreglo de códigos enteros."""
+        if isinstance(tipo_vegetacion, str):
+            df = self.df[self.codigo(tipo_vegetacion)]
+        else:
+            codigos = np.asarray(tipo_vegetacion)
+            if codigos.size and (codigos.min() < 0 or codigos.max() >= len(self.tipos)):
+                raise ValueError(f"Código de vegetación no válido. Rango: 0-{len(self.tipos) - 1}")
+            df = self.df[codigos]
         d_effective = d_km * df * 1000  # Distancia efectiva de vegetación
         
         return 1.33 * (f_GHz ** 0.284) * (d_effective ** 0.588) + 20 * np.log10(d_km) + 20 * np.log10(f_GHz) + 32.45
\ No newline at end of file